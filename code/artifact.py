@@ -0,0 +1,200 @@
+'''
+This script saves trained cultures to disk and loads them back.  It should not be run directly.
+
+A saved culture is a single uncompressed file: a short prefix, a JSON header describing every array, then the class labels, bin edges and grids as raw arrays aligned for memory mapping.  Loading can map the grids read-only, so scoring processes start at once and share pages of the same file.  The remaining small state of the culture, such as its kind, growth rule and fitness totals, is written into the header as plain values, so loading a file never runs code taken from it.
+'''
+
+# Standard Imports
+import json
+import numpy as np
+
+# Shared grid operations and growth rules
+import petri
+import growth
+
+# File prefix and layout version written by save
+# Load refuses files with a different version
+MAGIC = b'PETRI\0'
+VERSION = 2
+
+# Arrays start on multiples of this many bytes
+ALIGN = 64
+
+# Arrays that are memory mapped on load, the rest are small and read into memory
+mapped = ('keys', 'species', 'fitness', 'table')
+
+# Round up to the next aligned offset
+def aligned(n):
+
+	return -(-n // ALIGN)*ALIGN
+
+# Name nested lists of arrays so they can be written one array at a time
+def pack(tree, name, arrays):
+
+	if isinstance(tree, (list, tuple)):
+		return [pack(t, name + '.' + str(i), arrays) for i, t in enumerate(tree)]
+
+	arrays[name] = np.asarray(tree)
+	return name
+
+# Rebuild nested lists of arrays from their names
+# Single values come back as NumPy scalars
+def unpack(tree, arrays):
+
+	if isinstance(tree, list):
+		return [unpack(t, arrays) for t in tree]
+
+	a = arrays[tree]
+	return a[()] if a.ndim == 0 else a
+
+# Plain description of a growth rule
+def describe(rule):
+
+	if isinstance(rule, growth.gradient):
+		return {'name': 'gradient'}
+	if isinstance(rule, growth.majority):
+		return {'name': 'majority', 'stencil': [[np.asarray(offset).tolist(), np.asarray(w).item()] for offset, w in rule.stencil]}
+
+	raise ValueError("Cannot save growth rule " + type(rule).__name__)
+
+# Growth rule from its description
+def build(rule):
+
+	if rule['name'] == 'gradient':
+		return growth.gradient()
+	if rule['name'] == 'majority':
+		return growth.majority([(np.array(offset, dtype=int), w) for offset, w in rule['stencil']])
+
+	raise ValueError("Unknown growth rule in saved culture: " + str(rule['name']))
+
+# Save a culture to a single file
+# A frozen dense culture also keeps its prediction table, so loaded copies can predict without rebuilding it
+# Class labels must be numbers or strings
+def save(culture, path):
+
+	from cultures import kinds
+
+	names = [name for name, kind in kinds.items() if kind is type(culture)]
+	if not names:
+		raise ValueError("Cannot save culture of type " + type(culture).__name__)
+
+	classes = np.asarray(culture.classes)
+	if classes.dtype.hasobject:
+		raise ValueError("Cannot save class labels of type object")
+
+	arrays = {'classes': classes}
+	header = {'kind': names[0], 'rule': describe(culture.rule), 'dimensions': [int(d) for d in culture.dimensions], 'axes': [int(a) for a in culture.axes],
+		'totalfitness': float(culture.totalfitness), 'change': culture.change, 'stopped': culture.stopped}
+
+	# Fitness totals are kept by position in classes, since labels need not be valid JSON keys
+	codes = {label: i for i, label in enumerate(classes.tolist())}
+	header['fitnessdict'] = [[codes[np.asarray(label).item()], float(value)] for label, value in culture.fitnessdict.items()]
+
+	# Settings of a stack of cultures, including where its random generator has got to
+	if names[0] == 'ensemble':
+		header['ensemble'] = {'members': culture.members, 'jitter': culture.jitter, 'bootstrap': culture.bootstrap, 'rng': culture.rng.bit_generator.state}
+
+	# Grid arrays
+	grid = culture.grid
+	if isinstance(grid, petri.sparse):
+		header['grid'] = ['sparse', list(grid.shape)]
+		arrays['keys'], arrays['species'], arrays['fitness'] = grid.keys, grid.species, grid.fitness
+	else:
+		header['grid'] = ['dense', list(grid.shape)]
+		arrays['species'], arrays['fitness'] = grid.species, grid.fitness
+		if grid.table is not None:
+			arrays['table'] = grid.table
+
+	# Bin edges, then everything else
+	header['bins'] = pack(culture.bins, 'bins', arrays)
+	header['lowerbounds'] = pack(culture.lowerbounds, 'lowerbounds', arrays)
+
+	# Lay out the arrays one after another
+	offset = 0
+	header['arrays'] = dict()
+	for name, a in arrays.items():
+		a = np.ascontiguousarray(a)
+		arrays[name] = a
+		header['arrays'][name] = [a.dtype.str, list(a.shape), offset]
+		offset = aligned(offset + a.nbytes)
+
+	text = json.dumps(header).encode()
+	start = aligned(len(MAGIC) + 12 + len(text))
+	with open(path, 'wb') as f:
+		f.write(MAGIC)
+		f.write(np.array([VERSION], dtype='<u4').tobytes())
+		f.write(np.array([len(text)], dtype='<u8').tobytes())
+		f.write(text)
+		for name, a in arrays.items():
+			f.seek(start + header['arrays'][name][2])
+			f.write(a.tobytes())
+
+		# Pad the file out to the end of the last array
+		f.truncate(start + offset)
+
+# Load a culture saved with save
+# With mmap set the grids are mapped read-only from the file, which suits prediction but not further training
+def load(path, mmap=True):
+
+	from cultures import kinds
+
+	with open(path, 'rb') as f:
+		if f.read(len(MAGIC)) != MAGIC:
+			raise ValueError("Not a saved culture: " + str(path))
+
+		version = int(np.frombuffer(f.read(4), dtype='<u4')[0])
+		if version != VERSION:
+			raise ValueError("Saved culture has layout version " + str(version) + ", expected " + str(VERSION))
+
+		length = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+		header = json.loads(f.read(length).decode())
+		start = aligned(len(MAGIC) + 12 + length)
+
+		arrays = dict()
+		for name, (dtype, shape, offset) in header['arrays'].items():
+			count = int(np.prod(shape))
+			if mmap and count and name in mapped:
+				arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=start + offset, shape=tuple(shape))
+			else:
+				f.seek(start + offset)
+				arrays[name] = np.fromfile(f, dtype=dtype, count=count).reshape(shape)
+
+	# Rebuild the culture without running its constructor
+	if header['kind'] not in kinds:
+		raise ValueError("Unknown kind of saved culture: " + str(header['kind']))
+
+	kind = kinds[header['kind']]
+	culture = kind.__new__(kind)
+	culture.dimensions = header['dimensions']
+	culture.axes = tuple(header['axes'])
+	culture.rule = build(header['rule'])
+	culture.classes = arrays['classes']
+	culture.totalfitness = header['totalfitness']
+	culture.fitnessdict = {culture.classes[code]: value for code, value in header['fitnessdict']}
+	culture.change = header['change']
+	culture.stopped = header['stopped']
+
+	if 'ensemble' in header:
+		culture.members = header['ensemble']['members']
+		culture.jitter = header['ensemble']['jitter']
+		culture.bootstrap = header['ensemble']['bootstrap']
+		culture.rng = np.random.default_rng()
+		culture.rng.bit_generator.state = header['ensemble']['rng']
+
+	layout, shape = header['grid']
+	if layout == 'sparse':
+		grid = petri.sparse.__new__(petri.sparse)
+		grid.shape, grid.keys, grid.species, grid.fitness, grid.tree = tuple(shape), arrays['keys'], arrays['species'], arrays['fitness'], None
+	else:
+		grid = petri.dense.__new__(petri.dense)
+		grid.shape, grid.species, grid.fitness, grid.table = tuple(shape), arrays['species'], arrays['fitness'], arrays.get('table')
+
+	culture.grid = grid
+	culture.brood = petri.brood()
+	culture.bins = unpack(header['bins'], arrays)
+	culture.lowerbounds = unpack(header['lowerbounds'], arrays)
+	culture.frontier = None
+	culture.probe = None
+	culture.recorder = None
+
+	return culture
@@ -0,0 +1,407 @@
+'''
+This script holds the grid core shared by the cellular automation scripts.  It should not be run directly.
+
+A colony stores cells on a grid of bins, resolves competition between them and draws predictions from the trained grid.  Where daughters are placed each generation is left to a growth rule from growth.py, so biosystem.py, moore_biosystem.py and vonneumann_biosystem.py only choose a rule.
+'''
+
+# Standard Imports
+import time
+import numpy as np
+from copy import copy, deepcopy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared grid operations
+import petri
+import artifact
+from petri import EMPTY
+
+# Saved cultures are loaded with load(path), see artifact.py
+from artifact import load
+
+# Cell Class - Used only for storing data properties
+# Cells of rules without fitness count once in every competition
+class cell():
+
+	def __init__(self, s, f=1):
+		self.species = s
+		self.fitness = f
+
+# Grid Core Class
+class colony():
+
+	# Initialize important Properties
+	# Grid holds integer species codes and float fitnesses, either densely with one entry per bin or sparsely with occupied bins only
+	# Class labels are mapped to species codes by position in self.classes
+	def __init__(self, d, rule, sparse=False):
+
+		self.bins = []
+		self.lowerbounds = []
+		self.dimensions = d
+		self.axes = tuple(range(len(d)))
+		self.rule = rule
+		self.classes = np.array([])
+		self.grid = petri.sparse(d) if sparse else petri.dense(d)
+		self.brood = petri.brood()
+		self.totalfitness = 0
+		self.fitnessdict = dict()
+		self.frontier = None
+		self.change = None
+		self.stopped = None
+		self.probe = None
+		self.recorder = None
+
+	# Fill initial cells based on data values
+	# Options are passed to the initial growth step of the rule
+	def inoculate(self, data, classes, **options):
+
+		if self.probe is not None:
+			self.probe.start()
+
+		# Creation of bins
+		# Every bin is visited again on the next fermentation
+		self.bins, self.lowerbounds = petri.partition(data, self.dimensions)
+		self.frontier = None
+
+		# Class labels are converted to species codes
+		self.classes, codes = np.unique(classes, return_inverse=True)
+
+		# Initial sorting of data into bins
+		pos = petri.locate(data, self.bins, self.lowerbounds, self.dimensions, flat=True)[0]
+		self.brood.add(pos, codes, 1)
+
+		# Cells compete for control of the bins
+		self.compete()
+
+		# Initial cell growth
+		self.rule.seed(self, **options)
+		self.record('inoculate')
+
+	# Carry the trained grid over to a finer grid of bins d, for coarse to fine training
+	# Each fine bin takes the species and fitness of the coarse bin holding its center, then the data is sown again at the finer resolution
+	# Returns a new culture of the same kind, ready for a few refinement generations
+	def refine(self, d, data, classes):
+
+		if self.axes != tuple(range(len(self.dimensions))):
+			raise ValueError("Only a single culture can be refined")
+
+		fine = copy(self)
+		fine.dimensions = d
+		fine.grid = type(self.grid)(d)
+		fine.brood = petri.brood()
+		fine.frontier = None
+		fine.change = None
+		fine.stopped = None
+
+		# A probe or recorder keeps following the coarse culture
+		fine.probe = None
+		fine.recorder = None
+
+		# Creation of bins
+		# The coarse bin holding the center of each fine bin is found one axis at a time
+		fine.bins, fine.lowerbounds = petri.partition(data, d)
+		maps = []
+		for j in range(len(d)):
+			delta = fine.bins[j][0] - fine.lowerbounds[j]
+			centers = fine.lowerbounds[j] + (np.arange(d[j]) + 0.5)*delta
+			maps.append(np.clip(np.searchsorted(self.bins[j], centers, side='left'), 0, self.dimensions[j]-1))
+
+		fine.grid.write(*petri.upsample(*self.grid.occupied(), self.dimensions, d, maps))
+
+		# Data is sown again, taking back its bins from the upsampled cells
+		codes = fine.encode(classes)
+		pos = petri.locate(data, fine.bins, fine.lowerbounds, d, flat=True)[0]
+		fine.grid.settle(*petri.contest(pos, codes, np.ones(pos.size), fine.classes.size))
+
+		tally, census, fine.totalfitness = petri.tallies(fine.grid.census(fine.classes.size))
+		fine.fitnessdict = dict(zip(fine.classes[census > 0], tally[census > 0]))
+
+		return fine
+
+	# Online training on a further batch of data, keeping the bin edges found by inoculate
+	# New cells compete with the live grid, then only bins around those they changed are grown for the given number of generations
+	# The rest of the grid is left as it was, so a batch costs about as much as the bins it touches
+	# Returns the cell totals of each generation
+	def partial_fit(self, data, classes, iterations=3):
+
+		# A culture with no bins yet is inoculated as usual
+		if len(self.bins) == 0:
+			self.inoculate(data, classes)
+			return []
+
+		if self.probe is not None:
+			self.probe.start()
+
+		# Sorting of the new data into the existing bins
+		# Observations outside the grid fall into the nearest edge bin
+		codes = self.encode(classes)
+		pos, rows = self.sites(data)
+		self.brood.add(pos, codes[rows], 1)
+
+		# Cells compete for control of the bins, and bins they changed start the frontier
+		self.frontier = np.zeros(0, dtype=int)
+		self.compete()
+		self.record('partial_fit')
+
+		# Local cell growth
+		return [self.ferment() for i in range(iterations)]
+
+	# Species codes of class labels
+	# Labels not seen before become new species after the existing ones, so codes already on the grid keep their meaning
+	def encode(self, classes):
+
+		labels, inverse = np.unique(classes, return_inverse=True)
+		known = dict(zip(self.classes.tolist(), range(self.classes.size)))
+		new = [label for label in labels.tolist() if label not in known]
+		if new:
+			known.update(zip(new, range(self.classes.size, self.classes.size + len(new))))
+			self.classes = np.append(self.classes, new)
+
+		return np.array([known[label] for label in labels.tolist()], dtype=int)[inverse]
+
+	# Flat bins of observations, and the row of the observation sorted into each
+	def sites(self, data):
+
+		pos = petri.locate(data, self.bins, self.lowerbounds, self.dimensions, flat=True)[0]
+		return pos, np.arange(pos.size)
+
+	# Iteration function - cell growth
+	# Once a full generation has run, only bins the rule could reach from a changed bin are revisited
+	# Any bin further out would come out the same as before
+	def ferment(self):
+
+		if self.probe is not None:
+			self.probe.start()
+
+		# Create dictionary to track cell totals, kept up to date by the grid as bins change
+		t = self.tick()
+		abundance = self.grid.abundance(self.classes)
+		occupied = sum(abundance.values())
+		self.tock('census', t)
+
+		# Bins that can change this generation, falling back to a full scan when most of the grid is active
+		t = self.tick()
+		within = None
+		if self.frontier is not None and 2*self.frontier.size < occupied:
+			within = self.rule.affected(self, self.frontier)
+			if 2*within.size >= occupied:
+				within = None
+		self.tock('frontier', t)
+		self.count('visited', within.size if within is not None else np.prod(self.dimensions))
+
+		# Bins changed by this generation become the frontier for the next
+		self.frontier = None
+		self.rule.grow(self, within)
+		self.frontier = self.grid.changed
+		self.change = self.grid.change
+		self.record('ferment', abundance)
+
+		# Return new cell totals
+		return abundance
+
+	# Instrumentation hooks, which do nothing unless a probe is attached, see probe.py
+	# Phases are timed from a tick to the matching tock
+	def tick(self):
+
+		return time.perf_counter() if self.probe is not None else 0.0
+
+	def tock(self, phase, start):
+
+		if self.probe is not None:
+			self.probe.time(phase, start)
+
+	def count(self, name, n):
+
+		if self.probe is not None:
+			self.probe.count(name, n)
+
+	# Close the current step of an attached probe or recorder, see recorder.py
+	# Cell totals are counted here unless the step already has them
+	# Inoculation always leaves a full snapshot, since it does not track every bin it fills
+	def record(self, step, abundance=None):
+
+		if self.probe is not None:
+			if abundance is None:
+				abundance = self.grid.abundance(self.classes)
+			self.probe.finish(step, abundance, self.change)
+
+		if self.recorder is not None:
+			self.recorder.capture(self, step, key=step == 'inoculate')
+
+	# Stencil over the axes cells grow along, with no offset along any other axis of the grid
+	def stencil(self, stencil):
+
+		return petri.embed(stencil, self.axes, len(self.dimensions))
+
+	# Repeated cell growth that stops early once the grid settles, see petri.incubate
+	# Yields the cell totals of each generation, the reason for stopping is left in self.stopped
+	def ferment_until(self, iterations, tol=None, period=0):
+
+		return petri.incubate(self, iterations, tol, period)
+
+	# Competition function - ensure one cell per space on the grid
+	# All daughters queued since the last competition are resolved together
+	# Competition can be limited to a set of bins, leaving every other bin as it is
+	def compete(self, within=None):
+
+		t = self.tick()
+		pos, spec, fit = self.brood.gather()
+		tally, census, self.totalfitness = self.grid.compete(pos, spec, fit, self.classes.size, within)
+		self.fitnessdict = dict(zip(self.classes[census > 0], tally[census > 0]))
+		self.tock('compete', t)
+		self.count('daughters', self.grid.produced)
+		self.count('competitions', self.grid.resolved)
+
+		# Bins changed between fermentations are visited on the next one
+		if self.frontier is not None:
+			self.frontier = np.union1d(self.frontier, self.grid.changed)
+
+	# Function to add cells to the brood awaiting competition at a given index
+	# Catch common location error
+	def reproduce(self, pos, daughter):
+
+		try:
+			flat = np.ravel_multi_index(tuple(pos), self.dimensions)
+		except ValueError:
+			print("Location Error - Please Restart Simulation")
+			quit()
+
+		self.brood.add(flat, daughter.species, daughter.fitness if self.rule.weighted else 1)
+
+	# Freeze the trained grid for predictions
+	# Empty bins take the species of the nearest occupied bin so every observation has a mapping
+	# The frozen table is dropped again as soon as the grid changes
+	def freeze(self):
+
+		self.grid.freeze()
+
+	# Save the culture to a single file that load can map back into memory, see artifact.py
+	def save(self, path):
+
+		artifact.save(self, path)
+
+	# Function to predict classification after training the cell grid
+	# Observations outside the grid are classified by the nearest edge bin and their number is reported, or labelled -1 when strict is set
+	# A frozen culture answers from its prediction table with a single lookup
+	def harvest(self, data, strict=False):
+
+		pos, inside = petri.locate(data, self.bins, self.lowerbounds, self.dimensions, flat=True)
+		petri.outside(inside, strict)
+		if self.grid.frozen():
+			paula = self.grid.nearest(pos)
+		else:
+			paula = self.grid.lookup(pos, np.zeros(len(self.dimensions), dtype=int))[0]
+			if np.any(paula == EMPTY):
+				print("ERROR: Grid is not full, some observations have no mapping.")
+
+		if strict:
+			paula = np.where(inside, paula, EMPTY)
+
+		return petri.labels(self.classes, paula)
+
+	# Streaming harvest over an iterable of data chunks, such as petri.chunks of a memory-mapped file or batches from a CSV reader
+	# With more than one worker, chunks are classified on a pool of threads with at most two chunks per worker in flight, so memory stays bounded
+	# The grid is frozen first so every thread only reads the prediction table
+	# Yields the labels of each chunk in the order the chunks arrive, observations outside the grid being handled as in harvest
+	def reap(self, chunks, workers=1, strict=False):
+
+		if not self.grid.frozen():
+			self.freeze()
+
+		if workers <= 1:
+			for chunk in chunks:
+				yield self.harvest(chunk, strict)
+			return
+
+		with ThreadPoolExecutor(workers) as pool:
+			pending = deque()
+			for chunk in chunks:
+				pending.append(pool.submit(self.harvest, chunk, strict))
+				if len(pending) >= 2*workers:
+					yield pending.popleft().result()
+
+			while pending:
+				yield pending.popleft().result()
+
+	# Species code and fitness grids
+	# A sparse culture builds these on request, which needs memory for the whole grid
+	@property
+	def species(self):
+		return self.grid.todense()[0]
+
+	@property
+	def fitness(self):
+		return self.grid.todense()[1]
+
+	# Nested list view of the grid holding one cell per occupied bin
+	# Kept for scripts written against the original list of lists storage
+	@property
+	def cells(self):
+
+		view = empties(self.dimensions)
+		keys, spec, fit = self.grid.occupied()
+		for i, idx in enumerate(np.stack(np.unravel_index(keys, self.dimensions), axis=1)):
+			if self.rule.weighted:
+				self.get_cell(view, idx).append(cell(self.classes[spec[i]], fit[i]))
+			else:
+				self.get_cell(view, idx).append(cell(self.classes[spec[i]]))
+
+		return view
+
+	# Function to get cell array at a given index
+	def get_cell(self, c0, pos):
+
+		c = c0
+		for i in pos:
+			c = c[i]
+
+		return c
+
+	# Construct cell dictionaries
+	# Not used often - but an efficient way to represent overall data in a more accessible way
+	def cell_dictionaries(self):
+
+		cd = dict()
+		counts = dict()
+
+		keys, spec, fit = self.grid.occupied()
+		for i, clldct in enumerate(np.stack(np.unravel_index(keys, self.dimensions), axis=1)):
+
+			label = self.classes[spec[i]]
+			cd[len(cd)] = {'idx': clldct, 'species': label, 'fitness': fit[i]}
+
+			if label in counts:
+				counts[label] += 1
+			else:
+				counts[label] = 1
+
+		return cd, counts
+
+# Create array of empties for initial cell grid
+def empties(b):
+	
+	invB = np.flip(b, axis=0)
+	empty = []
+	for b in invB:
+		build = deepcopy(empty)
+		empty = []
+		for i in range(0,b):
+			empty.append(build)
+
+	return np.array(empty).tolist()
+
+# Increment index counter function
+# Needed because number of dimensions is unknown
+def increment(cntr, dims):
+
+	cntr[cntr.shape[0]-1] += 1
+	zeros = False
+	if np.where(dims-cntr == 0)[0] != 0: zeros = True
+	while zeros:
+		idx = np.where(dims-cntr == 0)[0][0]
+		cntr[idx] = 0
+		cntr[idx-1] += 1
+		if np.where(dims-cntr == 0)[0] != 0: zeros = True
+		else: zeros = False
+		
+	return cntr
@@ -0,0 +1,18 @@
+'''
+This script names the kinds of culture that other scripts, the estimator and saved files can refer to.  It should not be run directly.
+
+Saved cultures record the name of their kind rather than a module path, so loading a file only ever builds one of the classes listed here.
+'''
+
+# Classifier Imports
+import biosystem
+import moore_biosystem
+import vonneumann_biosystem
+from colony import colony
+from ensemble import ensemble
+
+# Cultures for every growth rule
+rules = {'gradient': biosystem.culture, 'moore': moore_biosystem.culture, 'vonneumann': vonneumann_biosystem.culture}
+
+# Every kind of culture that can be saved, by the name written to saved files
+kinds = dict(rules, ensemble=ensemble, colony=colony)
@@ -0,0 +1,113 @@
+'''
+This script holds an ensemble of cultures trained together as one stacked grid.  It should not be run directly.
+
+A culture's classification boundary depends on where the bin edges fall.  An ensemble trains several members at once, each with its bin edges shifted by a random fraction of a bin or on a bootstrap sample of the data, and predicts by a vote across the members.  Members are stacked along a leading axis that cells never grow along, so every generation is a single ferment over the whole stack.
+'''
+
+# Standard Imports
+import numpy as np
+
+# Grid core and growth rule
+import petri
+import growth
+from petri import EMPTY
+from colony import colony
+
+# Stack of cultures trained together
+# Each member shifts its bin edges by up to jitter of a bin width either way, and trains on a bootstrap sample when bootstrap is set
+# The growth rule defaults to the gradient rule of biosystem.py
+class ensemble(colony):
+
+	def __init__(self, d, k, rule=None, jitter=0.5, bootstrap=False, seed=None):
+
+		colony.__init__(self, [k] + list(d), rule or growth.gradient())
+		self.axes = tuple(range(1, len(d) + 1))
+		self.members = k
+		self.jitter = jitter
+		self.bootstrap = bootstrap
+		self.rng = np.random.default_rng(seed)
+
+	# Fill initial cells of every member based on data values
+	# Options are passed to the initial growth step of the rule
+	def inoculate(self, data, classes, **options):
+
+		if self.probe is not None:
+			self.probe.start()
+
+		data = np.asarray(data, dtype=float)
+		dims = self.dimensions[1:]
+		size = int(np.prod(dims))
+		self.frontier = None
+
+		# Class labels are converted to species codes
+		self.classes, codes = np.unique(classes, return_inverse=True)
+
+		# Creation of bins for every member, shifted by a random fraction of a bin width
+		self.bins, self.lowerbounds = [], []
+		for member in range(self.members):
+
+			rows = self.rng.integers(0, data.shape[0], data.shape[0]) if self.bootstrap else np.arange(data.shape[0])
+			bins, lowerbounds = petri.partition(data[rows], dims)
+			for j in range(len(dims)):
+				shift = self.jitter*self.rng.uniform(-1, 1)*(bins[j][0] - lowerbounds[j])
+				bins[j] = bins[j] + shift
+				lowerbounds[j] = lowerbounds[j] + shift
+
+			self.bins.append(bins)
+			self.lowerbounds.append(lowerbounds)
+
+			# Initial sorting of data into the bins of the member
+			pos = petri.locate(data[rows], bins, lowerbounds, dims, flat=True)[0]
+			self.brood.add(pos + member*size, codes[rows], 1)
+
+		# Cells compete for control of the bins
+		self.compete()
+
+		# Initial cell growth
+		self.rule.seed(self, **options)
+		self.record('inoculate')
+
+	# Flat bins of observations in every member, and the row of the observation sorted into each
+	# Further batches of data reach every member, without bootstrap sampling
+	def sites(self, data):
+
+		dims = self.dimensions[1:]
+		size = int(np.prod(dims))
+		pos = [petri.locate(data, self.bins[member], self.lowerbounds[member], dims, flat=True)[0] + member*size for member in range(self.members)]
+
+		return np.concatenate(pos), np.tile(np.arange(pos[0].size), self.members)
+
+	# Freeze the trained stack for predictions
+	# Empty bins take the species of the nearest occupied bin of the same member
+	def freeze(self):
+
+		self.grid.table = np.stack([petri.nearest(self.grid.species[member]) for member in range(self.members)])
+
+	# Function to predict classification after training the stack
+	# Every member votes for the species in the bin of each observation, ties going to the first class
+	# Observations outside the grid of a member take its nearest edge bin, unless strict is set, when that member does not vote
+	# Observations outside every grid are reported, and labelled -1 when strict is set
+	def harvest(self, data, strict=False):
+
+		dims = self.dimensions[1:]
+		size = int(np.prod(dims))
+		votes = np.zeros((np.asarray(data).reshape(-1, len(dims)).shape[0], self.classes.size), dtype=int)
+		anywhere = np.zeros(votes.shape[0], dtype=bool)
+
+		for member in range(self.members):
+			pos, inside = petri.locate(data, self.bins[member], self.lowerbounds[member], dims, flat=True)
+			anywhere |= inside
+			if self.grid.frozen():
+				spec = self.grid.nearest(pos + member*size)
+			else:
+				spec = self.grid.lookup(pos + member*size, np.zeros(len(self.dimensions), dtype=int))[0]
+
+			if strict:
+				spec = np.where(inside, spec, EMPTY)
+			np.add.at(votes, (np.flatnonzero(spec != EMPTY), spec[spec != EMPTY]), 1)
+
+		petri.outside(anywhere, strict)
+		if np.any((votes.sum(axis=1) == 0) & anywhere):
+			print("ERROR: Grid is not full, some observations have no mapping.")
+
+		return petri.labels(self.classes, np.where(votes.sum(axis=1) > 0, np.argmax(votes, axis=1), EMPTY))
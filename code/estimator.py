@@ -0,0 +1,111 @@
+'''
+This script wraps the cellular automation cultures as a scikit-learn classifier.  It should not be run directly.
+
+The classifier runs the same steps as 'run_main.py': a culture is built with m bins along every feature, inoculated with the training data, fermented for a number of generations and frozen for predictions.  It can be placed in pipelines and tuned with GridSearchCV like any other scikit-learn estimator.
+'''
+
+# Standard Imports
+import hashlib
+import numpy as np
+import multiprocessing
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.utils.multiclass import check_classification_targets
+from sklearn.utils.validation import validate_data, check_is_fitted
+
+# Classifier Imports
+import petri
+import parallel
+from cultures import rules
+
+# Rows classified at a time when predicting on several threads
+CHUNK = 65536
+
+# Fingerprint of training data, used to tell whether a warm start is fitting the same data again
+def fingerprint(X, y):
+
+	h = hashlib.blake2b(digest_size=16)
+	for a in (X, y):
+		a = np.ascontiguousarray(a)
+		h.update(str((a.dtype.str, a.shape)).encode())
+		h.update(a.tobytes())
+
+	return h.hexdigest()
+
+# Cellular automation classifier
+# m is the number of bins along every feature, or a list with one count per feature
+# With warm_start set, fitting again on the same data continues fermenting the trained culture up to the new number of iterations instead of starting over
+# New data, or a change of grid or storage, always starts over
+# n_jobs fermentations of dense cultures run on the slab engine of parallel.py, and predictions on a pool of threads, -1 meaning every core and -2 all but one
+class classifier(ClassifierMixin, BaseEstimator):
+
+	def __init__(self, m=12, iterations=50, rule='gradient', sparse=False, warm_start=False, n_jobs=None):
+
+		self.m = m
+		self.iterations = iterations
+		self.rule = rule
+		self.sparse = sparse
+		self.warm_start = warm_start
+		self.n_jobs = n_jobs
+
+	# Worker count from n_jobs, negative values counting back from every core as in scikit-learn
+	def workers(self):
+
+		if self.n_jobs is None:
+			return 1
+
+		return max(1, multiprocessing.cpu_count() + 1 + self.n_jobs) if self.n_jobs < 0 else self.n_jobs
+
+	# Train the culture on features X and labels y
+	def fit(self, X, y):
+
+		X, y = validate_data(self, X, y)
+		check_classification_targets(y)
+		if self.rule not in rules:
+			raise ValueError("Unknown growth rule: " + str(self.rule) + ", expected one of " + ", ".join(rules))
+
+		d = [self.m]*X.shape[1] if np.isscalar(self.m) else list(self.m)
+		if len(d) != X.shape[1]:
+			raise ValueError("Expected " + str(X.shape[1]) + " bin counts, got " + str(len(d)))
+
+		# The grid spans the range of every feature, so each one needs at least two distinct values
+		if X.shape[0] < 2:
+			raise ValueError("Found 1 sample (n_samples = 1), at least 2 are needed to span the grid")
+		constant = np.flatnonzero(np.ptp(X, axis=0) == 0)
+		if constant.size:
+			raise ValueError("Features " + ", ".join(str(j) for j in constant) + " take the same value in every sample, so the grid cannot span them")
+
+		# A warm start keeps the trained culture when its data and settings still match
+		data = fingerprint(X, y)
+		warm = self.warm_start and hasattr(self, 'culture_') and self.data_ == data and self.culture_.dimensions == d
+		warm = warm and type(self.culture_) is rules[self.rule] and isinstance(self.culture_.grid, petri.sparse) == bool(self.sparse)
+		if not warm:
+			self.culture_ = rules[self.rule](d, sparse=self.sparse)
+			self.culture_.inoculate(X, y)
+			self.data_ = data
+			self.n_iter_ = 0
+
+		# Iteration cycles
+		remaining = max(0, self.iterations - self.n_iter_)
+		if self.workers() > 1 and not self.sparse:
+			for a in parallel.ferment(self.culture_, remaining, self.workers()):
+				pass
+		else:
+			for i in range(remaining):
+				self.culture_.ferment()
+
+		self.n_iter_ += remaining
+		self.culture_.freeze()
+		self.classes_ = self.culture_.classes
+
+		return self
+
+	# Predict labels of features X
+	def predict(self, X):
+
+		check_is_fitted(self, 'culture_')
+		X = validate_data(self, X, reset=False)
+
+		if self.workers() > 1:
+			return np.concatenate([labels for labels in self.culture_.reap(petri.chunks(X, CHUNK), self.workers())])
+
+		return self.culture_.harvest(X)
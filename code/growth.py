@@ -0,0 +1,277 @@
+'''
+This script holds the cell growth rules used by the cellular automation scripts.  It should not be run directly.
+
+A rule decides where daughters are placed each generation, while storage, competition and predictions are handled by colony.py.  Each rule also reports how far a change to one bin can reach in one generation, so that only bins near a change need to be revisited.
+'''
+
+# Standard Imports
+import numpy as np
+
+# Shared grid operations
+import petri
+import kernels
+from petri import EMPTY
+
+# Gradient growth - daughters are pushed away from cells of the same species
+# Initial growth uses Coulomb repulsion between all cells, later growth uses the fitness gradient across von Neumann neighbors
+class gradient():
+
+	# Daughters carry fitness, which decides competitions
+	# A bin is settled by cells up to two von Neumann steps away
+	weighted = True
+	radius = 2
+
+	# Growth from the initial cells of a culture
+	# Repulsion between cells more than one block of bins apart is approximated when block is given
+	def seed(self, culture, block=None):
+
+		# dimension variables
+		# Cells only grow along the axes of the culture, any other axis separates members of a stack
+		dims = np.array(culture.dimensions)
+		axes = np.array(culture.axes)
+		n = axes.size
+
+		# Create useful variables for initial cell growth step
+		# Cells are grouped by species and by their position along the axes they do not grow on
+		keys, spec, fit = culture.grid.occupied()
+		occupied = np.stack(np.unravel_index(keys, culture.dimensions), axis=1)
+		apart = np.delete(occupied, axes, axis=1)
+		groups, kin, cellcount = np.unique(np.column_stack((apart, spec)), axis=0, return_inverse=True, return_counts=True)
+		kin = kin.reshape(-1)
+		lone = cellcount[kin] <= 1
+		v45 = np.ones(n)/np.sqrt(2)
+
+		# Calculate a replusion vector based on "Coulomb"-like force equation
+		# Cells are only repelled by other cells of their own species
+		t = culture.tick()
+		repulsion = np.zeros((keys.size, n))
+		for g in np.flatnonzero(cellcount > 1):
+			repulsion[kin == g] = coulomb(occupied[kin == g][:, axes], fit[kin == g], block)
+
+		# Normalize repulsion vectors to unit vectors
+		with np.errstate(divide='ignore', invalid='ignore'):
+			repulsion = repulsion / petri.norm(repulsion)[:, None]
+		culture.tock('repulsion', t)
+
+		# If only one cell in a class, growth cannot be based on Coulomb repulsion
+		# Those cells add daughters with equal fitness to each Moore neighbor
+		# Other cells add daughters to Moore neighbors that are in the direction of the repulsion vector
+		# Total fitness of the cells added to neighboring spaces is equal to the fitness of the current cell
+		# Proportion of fitness added to neighboring cells is determined by the angle of the repulsion vector
+		face = np.where(lone[:, None], (fit/(n**3-1))[:, None], fit[:, None]*np.absolute(repulsion))
+		diagonal = np.where(lone, fit/(n**3-1), fit*(petri.dot(np.absolute(repulsion), v45)/v45.dot(v45))/np.sqrt(2))
+		culture.count('fallbacks', np.count_nonzero(lone))
+
+		# Compiled growth produces daughters directly in scan order
+		t = culture.tick()
+		if kernels.compiled:
+			pos, cells, daughters = kernels.seed(occupied, dims, axes, lone, repulsion, face, diagonal)
+			culture.brood.add(pos, spec[cells], daughters)
+			culture.tock('daughters', t)
+			culture.compete()
+			return
+
+		# Neighbors are visited in the same order for every cell, one axis and direction at a time
+		rank, tgt, daughters = [], [], []
+		step = 0
+		for d1 in range(0, n):
+			for s1 in (1, -1):
+
+				instance1 = occupied.copy()
+				instance1[:, axes[d1]] += s1
+				grow1 = (instance1[:, axes[d1]] >= 0) & (instance1[:, axes[d1]] < dims[axes[d1]]) & (lone | (s1*repulsion[:, d1] > 0))
+
+				rank.append(np.flatnonzero(grow1)*4*n**2 + step)
+				tgt.append(instance1[grow1])
+				daughters.append(face[grow1, d1])
+				step += 1
+
+				for d2 in range(0, n):
+					if d2 != d1:
+						for s2 in (1, -1):
+
+							instance2 = instance1.copy()
+							instance2[:, axes[d2]] += s2
+							grow2 = grow1 & (instance2[:, axes[d2]] >= 0) & (instance2[:, axes[d2]] < dims[axes[d2]]) & (lone | (s2*repulsion[:, d2] > 0))
+
+							rank.append(np.flatnonzero(grow2)*4*n**2 + step)
+							tgt.append(instance2[grow2])
+							daughters.append(diagonal[grow2])
+							step += 1
+
+		# Daughters are queued cell by cell in the order they would be produced by a scan of the grid
+		order = np.argsort(np.concatenate(rank))
+		cells = np.concatenate(rank)[order] // (4*n**2)
+		culture.brood.add(np.ravel_multi_index(tuple(np.concatenate(tgt)[order].T), culture.dimensions), spec[cells], np.concatenate(daughters)[order])
+		culture.tock('daughters', t)
+
+		# Cells compete for control of the bins
+		culture.compete()
+
+	# Bins that can change this generation given the bins that changed in the last one
+	# A daughter is placed one von Neumann step away by a cell whose repulsion depends on its own von Neumann neighbors
+	def affected(self, culture, frontier):
+
+		return petri.affected(frontier, culture.stencil(petri.vonneumann(len(culture.axes))), culture.dimensions, self.radius)
+
+	# One generation of growth, grown at once from a snapshot of the grid taken before any daughters are added
+	# Growth can be limited to a set of bins, leaving every other bin as it is
+	def grow(self, culture, within=None):
+
+		# Iteration variables
+		# Cells only grow along the axes of the culture
+		axes = culture.axes
+		n = len(axes)
+		t = culture.tick()
+		if within is None:
+			keys, s0, f0 = culture.grid.occupied()
+		else:
+			keys = petri.reach(within, culture.stencil(petri.vonneumann(n)), culture.dimensions)
+			s0, f0 = culture.grid.lookup(keys, np.zeros(len(culture.dimensions), dtype=int))
+			keys, s0, f0 = keys[s0 != EMPTY], s0[s0 != EMPTY], f0[s0 != EMPTY]
+
+		# Species and fitness of the von Neumann neighbors below and above each cell along every axis
+		lo = [culture.grid.lookup(keys, -np.eye(len(culture.dimensions), dtype=int)[d]) for d in axes]
+		hi = [culture.grid.lookup(keys, np.eye(len(culture.dimensions), dtype=int)[d]) for d in axes]
+
+		# Calculate a replusion vector based on "Coulomb"-like force equation
+		# Computation only considers von Neumann neighbors of the same species
+		repulsion = np.zeros((keys.size, n))
+		for d in range(n):
+			repulsion[:, d] = np.where(lo[d][0] == s0, f0*lo[d][1], 0) - np.where(hi[d][0] == s0, f0*hi[d][1], 0)
+
+		# Normalize repulsion vectors to unit vectors
+		# Cells with no repulsion are left as nan and do not grow
+		with np.errstate(divide='ignore', invalid='ignore'):
+			repulsion = repulsion / petri.norm(repulsion)[:, None]
+		culture.tock('repulsion', t)
+
+		# Compiled growth produces daughters directly in scan order
+		t = culture.tick()
+		if kernels.compiled:
+			slo, flo = (np.array(x) for x in zip(*lo))
+			shi, fhi = (np.array(x) for x in zip(*hi))
+			strides = np.array([petri.stride(culture.dimensions, d) for d in axes])
+			tgt, spec, fit = kernels.gradient(keys, s0, f0, slo, flo, shi, fhi, repulsion, np.array(culture.dimensions)[list(axes)], strides)
+		else:
+			tgt, spec, fit = self.daughters(culture, keys, s0, f0, lo, hi, repulsion)
+
+		# Daughters landing outside the active bins are dropped along with the bins they would contest
+		if within is not None:
+			keep = np.isin(tgt, within)
+			tgt, spec, fit = tgt[keep], spec[keep], fit[keep]
+		culture.brood.add(tgt, spec, fit)
+		culture.tock('daughters', t)
+
+		# Daughters opposite an empty bin fall back to zero fitness
+		if culture.probe is not None:
+			culture.count('fallbacks', np.count_nonzero(fit == 0))
+
+		# Cells compete for control of the bins
+		culture.compete(within)
+
+	# Daughters of one generation of growth in the order of a bin by bin scan, one axis at a time
+	def daughters(self, culture, keys, s0, f0, lo, hi, repulsion):
+
+		n = len(culture.axes)
+
+		# Add cells to von Neumann neighbors that are in the direction of the repulsion vector
+		# Proportion of fitness added to neighboring cells is determined by the angle of the repulsion vector as well as the gradient of the opposite von Neumann neighbor and the current cell
+		# Daughters opposite an empty bin are given zero fitness
+		rank, tgt, spec, fit = [], [], [], []
+		for d, axis in enumerate(culture.axes):
+
+			coord = (keys // petri.stride(culture.dimensions, axis)) % culture.dimensions[axis]
+			grow = (coord > 0) & (coord < culture.dimensions[axis]-1) & ((repulsion[:, d] > 0) | (repulsion[:, d] < 0))
+			up = repulsion[grow, d] > 0
+
+			sopp = np.where(up, lo[d][0][grow], hi[d][0][grow])
+			fopp = np.where(up, lo[d][1][grow], hi[d][1][grow])
+			with np.errstate(divide='ignore', invalid='ignore'):
+				fd = np.where(sopp != EMPTY, np.absolute(repulsion[grow, d])*f0[grow]/fopp, 0)
+
+			rank.append(np.flatnonzero(grow)*n + d)
+			tgt.append(keys[grow] + np.where(up, 1, -1)*petri.stride(culture.dimensions, axis))
+			spec.append(s0[grow])
+			fit.append(fd)
+
+		# Daughters are queued in the order of a bin by bin scan, one axis at a time
+		order = np.argsort(np.concatenate(rank))
+		return np.concatenate(tgt)[order], np.concatenate(spec)[order], np.concatenate(fit)[order]
+
+# Majority growth - empty bins are taken by the species with most cells in their neighborhood
+# Used with Moore and von Neumann stencils as unbiased baselines
+class majority():
+
+	# Every cell counts once, so the species with maximum cell count wins a bin
+	# A bin is settled by the cells one stencil step away
+	weighted = False
+	radius = 1
+
+	def __init__(self, stencil):
+
+		self.stencil = stencil
+
+	# No growth beyond the initial cells
+	def seed(self, culture):
+
+		pass
+
+	# Bins that can change this generation given the bins that changed in the last one
+	def affected(self, culture, frontier):
+
+		return petri.affected(frontier, culture.stencil(self.stencil), culture.dimensions)
+
+	# One generation of growth
+	# Occupied bins receive no daughters, so no further competition step is needed
+	def grow(self, culture, within=None):
+
+		t = culture.tick()
+		culture.grid.spread(culture.stencil(self.stencil), culture.classes.size, within)
+		culture.tock('spread', t)
+		culture.count('daughters', culture.grid.produced)
+		culture.count('competitions', culture.grid.resolved)
+
+# Coulomb repulsion acting on each cell from every other cell given
+# With a block size, cells are grouped into blocks of bins and distant blocks act through their total fitness at their center
+def coulomb(idx, fit, block=None):
+
+	idx = idx.astype(float)
+	if block is None:
+		return pairwise(idx, fit, idx, fit)
+
+	# Group cells into blocks and find the center and total fitness of each block
+	home = np.floor_divide(idx, block)
+	blocks, inv = np.unique(home, axis=0, return_inverse=True)
+	inv = inv.reshape(-1)
+	counts = np.bincount(inv)
+	mass = np.bincount(inv, weights=fit)
+	center = np.stack([np.bincount(inv, weights=idx[:, d])/counts for d in range(idx.shape[1])], axis=1)
+
+	# Neighboring blocks act cell by cell, all others act as a single charge
+	force = np.zeros(idx.shape)
+	for b in range(0, blocks.shape[0]):
+		mine = inv == b
+		near = np.all(np.absolute(blocks - blocks[b]) <= 1, axis=1)
+		force[mine] = pairwise(idx[mine], fit[mine], idx[near[inv]], fit[near[inv]]) + pairwise(idx[mine], fit[mine], center[~near], mass[~near])
+
+	return force
+
+# Sum of fitness weighted inverse distance repulsion on each target from every source
+# Sources sitting on a target are skipped, and pairs are taken a chunk of targets at a time to bound memory
+# Terms are added one source at a time in the order given, as a cell by cell loop would add them
+def pairwise(targets, tfit, sources, sfit, budget=2**22):
+
+	force = np.zeros(targets.shape)
+	chunk = max(1, budget // max(1, sources.size))
+	for a in range(0, targets.shape[0], chunk):
+
+		diff = targets[None, a:a+chunk, :] - sources[:, None, :]
+		r2 = np.sum(diff**2, axis=2)
+		with np.errstate(divide='ignore', invalid='ignore'):
+			terms = (tfit[None, a:a+chunk, None]*sfit[:, None, None]*diff)/(np.sqrt(r2)**2)[:, :, None]
+		terms[r2 == 0] = 0
+
+		force[a:a+chunk] = np.sum(terms, axis=0)
+
+	return force
@@ -0,0 +1,153 @@
+'''
+This script holds compiled loops for the busiest steps of the cellular automation scripts.  It should not be run directly.
+
+The loops are compiled with Numba when it is installed.  Without Numba, compiled is False and every caller keeps to its NumPy path, so results are the same either way.  Setting compiled to False also forces the NumPy path.
+'''
+
+# Standard Imports
+import numpy as np
+
+# Numba is optional
+try:
+	from numba import njit
+except ImportError:
+	njit = None
+
+# Whether the compiled loops are used
+compiled = njit is not None
+
+# Competition over bins, see petri.contest
+# Competitors are visited bin by bin in the order they arrived, keeping running sums per species
+def contest(pos, spec, fit, k):
+
+	order = np.argsort(pos, kind='mergesort')
+	bins = np.empty(pos.size, dtype=np.int64)
+	win = np.empty(pos.size, dtype=np.int64)
+	net = np.empty(pos.size)
+
+	sums = np.zeros(k)
+	seen = np.zeros(k, dtype=np.bool_)
+	groups = np.empty(k, dtype=np.int64)
+	count = 0
+	a = 0
+	while a < pos.size:
+
+		# Sum fitness for every species in the bin, noting the order species arrived in
+		b = a
+		ngroups = 0
+		while b < pos.size and pos[order[b]] == pos[order[a]]:
+			s = spec[order[b]]
+			if not seen[s]:
+				seen[s] = True
+				sums[s] = 0.0
+				groups[ngroups] = s
+				ngroups += 1
+			sums[s] += fit[order[b]]
+			b += 1
+
+		# Running max over species in order of arrival, so a nan can only win when it came first
+		best = groups[0]
+		total = 0.0
+		for g in range(ngroups):
+			s = groups[g]
+			total += sums[s]
+			if sums[s] > sums[best]:
+				best = s
+			seen[s] = False
+
+		bins[count] = pos[order[a]]
+		win[count] = best
+		net[count] = 2*sums[best] - total
+		count += 1
+		a = b
+
+	return bins[:count], win[:count], net[:count]
+
+# Daughters of one generation of gradient growth, see growth.gradient
+# Neighbor species and fitness are given per axis, lo below and hi above each cell
+# Daughters come out cell by cell, one axis at a time
+def gradient(keys, s0, f0, slo, flo, shi, fhi, repulsion, dims, strides):
+
+	m, n = repulsion.shape
+	tgt = np.empty(m*n, dtype=np.int64)
+	spec = np.empty(m*n, dtype=np.int64)
+	fit = np.empty(m*n)
+
+	count = 0
+	for i in range(m):
+		for d in range(n):
+
+			coord = (keys[i] // strides[d]) % dims[d]
+			r = repulsion[i, d]
+			if coord <= 0 or coord >= dims[d]-1 or not (r > 0 or r < 0):
+				continue
+
+			# Daughters opposite an empty bin are given zero fitness, empty bins holding species -1 as in petri
+			if r > 0:
+				sopp, fopp, step = slo[d, i], flo[d, i], strides[d]
+			else:
+				sopp, fopp, step = shi[d, i], fhi[d, i], -strides[d]
+
+			tgt[count] = keys[i] + step
+			spec[count] = s0[i]
+			fit[count] = np.absolute(r)*f0[i]/fopp if sopp != -1 else 0.0
+			count += 1
+
+	return tgt[:count], spec[:count], fit[:count]
+
+# Daughters of the initial growth step of the gradient rule, see growth.gradient.seed
+# Each cell visits its Moore neighbors along the growth axes one axis and direction at a time, reaching diagonals through the face it grew into
+# Returns the flat bin, producing cell and fitness of every daughter in the order produced
+def seed(occupied, dims, axes, lone, repulsion, face, diagonal):
+
+	m, ndim = occupied.shape
+	n = axes.size
+	strides = np.ones(ndim, dtype=np.int64)
+	for d in range(ndim-2, -1, -1):
+		strides[d] = strides[d+1]*dims[d+1]
+
+	tgt = np.empty(m*4*n*n, dtype=np.int64)
+	cells = np.empty(m*4*n*n, dtype=np.int64)
+	fit = np.empty(m*4*n*n)
+
+	count = 0
+	for i in range(m):
+
+		home = 0
+		for d in range(ndim):
+			home += occupied[i, d]*strides[d]
+
+		for d1 in range(n):
+			for s1 in (1, -1):
+
+				a1 = axes[d1]
+				c1 = occupied[i, a1] + s1
+				if c1 < 0 or c1 >= dims[a1] or not (lone[i] or s1*repulsion[i, d1] > 0):
+					continue
+
+				tgt[count] = home + s1*strides[a1]
+				cells[count] = i
+				fit[count] = face[i, d1]
+				count += 1
+
+				for d2 in range(n):
+					if d2 != d1:
+						for s2 in (1, -1):
+
+							a2 = axes[d2]
+							c2 = occupied[i, a2] + s2
+							if c2 < 0 or c2 >= dims[a2] or not (lone[i] or s2*repulsion[i, d2] > 0):
+								continue
+
+							tgt[count] = home + s1*strides[a1] + s2*strides[a2]
+							cells[count] = i
+							fit[count] = diagonal[i]
+							count += 1
+
+	return tgt[:count], cells[:count], fit[:count]
+
+# Compile the loops, with NumPy rules for division so that a zero fitness gives inf or nan as it does in NumPy
+if compiled:
+	contest = njit(cache=True, error_model='numpy')(contest)
+	gradient = njit(cache=True, error_model='numpy')(gradient)
+	seed = njit(cache=True, error_model='numpy')(seed)
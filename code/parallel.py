@@ -0,0 +1,107 @@
+'''
+This script runs fermentation of large dense cultures across several worker processes.  It should not be run directly.
+
+The grid is split into slabs along its first axis.  Species and fitness live in shared memory, twice over, so workers read one generation and write the next without copying the grid between processes.  Each worker also reads a halo of rows around its slab, as deep as the growth rule can reach in one generation, so every slab comes out exactly as it would in a single process.
+'''
+
+# Standard Imports
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+
+# Grid core
+import petri
+from petri import EMPTY
+from colony import colony
+
+# Shared grids and growth rule of a worker, attached once when the worker starts
+state = dict()
+
+# Attach a worker to the shared grids
+def attach(names, shape, rule, classes, axes):
+
+	state['memory'] = [shared_memory.SharedMemory(name=name) for name in names]
+	state['grids'] = [np.ndarray(shape, dtype=dtype, buffer=m.buf) for m, dtype in zip(state['memory'], (int, float, int, float))]
+	state['shape'] = shape
+	state['rule'] = rule
+	state['classes'] = classes
+	state['axes'] = axes
+
+# Grow rows a to b of the grid held in species and fitness, returning the new rows
+# The rows are copied with a halo as deep as the rule reaches and grown as a culture of their own
+# Rows of the halo come out wrong near the cut, but they are never returned
+def band(species, fitness, a, b, rule, classes, axes):
+
+	lo, hi = max(0, a - rule.radius), min(species.shape[0], b + rule.radius)
+	local = colony([hi - lo] + list(species.shape[1:]), rule)
+	local.axes = axes
+	local.classes = classes
+	local.grid.species = np.array(species[lo:hi])
+	local.grid.fitness = np.array(fitness[lo:hi])
+	rule.grow(local)
+
+	return local.grid.species[a-lo:b-lo], local.grid.fitness[a-lo:b-lo]
+
+# Grow one slab of rows a to b, reading generation src and writing the other generation
+def slab(task):
+
+	src, a, b = task
+	species, fitness = state['grids'][2*src:2*src+2]
+	nspecies, nfitness = state['grids'][2-2*src:4-2*src]
+	nspecies[a:b], nfitness[a:b] = band(species, fitness, a, b, state['rule'], state['classes'], state['axes'])
+
+# Ferment a dense culture for a number of generations using worker processes
+# Slabs default to one per worker, and the results match culture.ferment generation by generation
+# Yields the cell totals of each generation, and once every generation has run leaves the final grid and change on the culture
+def ferment(culture, iterations, workers=None, slabs=None):
+
+	if not isinstance(culture.grid, petri.dense):
+		raise ValueError("Slab fermentation needs a dense grid")
+
+	shape = culture.grid.shape
+	workers = workers or multiprocessing.cpu_count()
+	slabs = min(shape[0], slabs or workers)
+	edges = np.linspace(0, shape[0], slabs + 1).astype(int)
+
+	# Two generations of species and fitness in shared memory
+	memory = [shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape))*8)) for i in range(4)]
+	try:
+		grids = [np.ndarray(shape, dtype=dtype, buffer=m.buf) for m, dtype in zip(memory, (int, float, int, float))]
+		grids[0][...] = culture.grid.species
+		grids[1][...] = culture.grid.fitness
+		before = (culture.grid.species.copy(), culture.grid.fitness.copy())
+
+		src = 0
+		with multiprocessing.Pool(workers, attach, ([m.name for m in memory], shape, culture.rule, culture.classes, culture.axes)) as pool:
+			for i in range(iterations):
+
+				# Create dictionary to track cell totals
+				species = grids[2*src].reshape(-1)
+				abundance = petri.abundance(species[species != EMPTY], culture.classes)
+
+				# Every slab reads the same generation, so halos are exchanged simply by swapping generations
+				if i == iterations - 1:
+					before = (grids[2*src].copy(), grids[2*src+1].copy())
+				pool.map(slab, [(src, edges[j], edges[j+1]) for j in range(slabs) if edges[j] < edges[j+1]])
+				src = 1 - src
+
+				yield abundance
+
+		# Merge the final generation back into the culture as one competition step would leave it
+		culture.grid.write(np.arange(int(np.prod(shape))), grids[2*src].reshape(-1).copy(), grids[2*src+1].reshape(-1).copy())
+		s0, f0 = before[0].reshape(-1), before[1].reshape(-1)
+		s1, f1 = culture.grid.species.reshape(-1), culture.grid.fitness.reshape(-1)
+		moved = (s0 != s1) | (f0.view(np.int64) != f1.view(np.int64))
+		culture.grid.changed = np.flatnonzero(moved)
+		culture.grid.change = petri.changes(s0[moved], f0[moved], s1[moved], f1[moved])
+
+		if culture.rule.weighted:
+			tally, census, culture.totalfitness = petri.tallies(culture.grid.census(culture.classes.size))
+			culture.fitnessdict = dict(zip(culture.classes[census > 0], tally[census > 0]))
+		culture.frontier = culture.grid.changed
+		culture.change = culture.grid.change
+
+	finally:
+		for m in memory:
+			m.close()
+			m.unlink()
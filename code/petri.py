@@ -0,0 +1,705 @@
+'''
+This script holds grid operations shared by the cellular automation scripts.  It should not be run directly.
+
+Every function here works on a whole grid of bins at once using NumPy arrays, so that cell growth rules can be expressed without visiting bins one at a time.
+'''
+
+# Standard Imports
+import hashlib
+import numpy as np
+from scipy import ndimage, spatial
+
+# Compiled loops, used when available
+import kernels
+
+# Species code used to mark an empty bin on the grid
+EMPTY = -1
+
+# Value held by the bin at a fixed offset from every bin
+# Bins whose offset position falls off the edge of the grid receive the fill value
+def shifted(a, offset, fill):
+
+	out = np.full(a.shape, fill, dtype=a.dtype)
+	src = []
+	dst = []
+	for o in offset:
+		if o > 0:
+			src.append(slice(o, None))
+			dst.append(slice(0, -o))
+		elif o < 0:
+			src.append(slice(0, o))
+			dst.append(slice(-o, None))
+		else:
+			src.append(slice(None))
+			dst.append(slice(None))
+
+	out[tuple(dst)] = a[tuple(src)]
+	return out
+
+# Number of flat indices between neighboring bins along an axis
+def stride(shape, axis):
+
+	return int(np.prod(shape[axis+1:], dtype=int))
+
+# Dot product of vectors along the last axis
+# Each product is rounded exactly as a single call to np.dot would round it
+def dot(u, v):
+
+	u, v = (np.ascontiguousarray(x) for x in np.broadcast_arrays(u, v))
+	return np.matmul(u[..., None, :], v[..., :, None])[..., 0, 0]
+
+# Length of vectors along the last axis, matching np.linalg.norm for a single vector
+def norm(v):
+
+	return np.sqrt(dot(v, v))
+
+# Creation of bins
+# Each dimension is split evenly over the data range widened by 10% on either side
+# Returns the upper edge of every bin and the lower bound of the first bin along each dimension
+def partition(data, dims):
+
+	bins = []
+	lowerbounds = []
+	for j in range(0, len(dims)):
+
+		min_dat = np.min(data[:, j]) - 0.1*(np.max(data[:, j])-np.min(data[:, j]))
+		max_dat = np.max(data[:, j]) + 0.1*(np.max(data[:, j])-np.min(data[:, j]))
+		delta = (max_dat-min_dat)/dims[j]
+
+		bins.append(np.arange(min_dat, max_dat, delta)+delta)
+		lowerbounds.append(min_dat)
+
+	return bins, lowerbounds
+
+# Sorting of data into bins
+# Gives the bin index of every point along every dimension, or its flat index on the grid when flat is set
+# Points outside the grid are placed in the nearest edge bin and flagged as False in the returned inside mask
+def locate(data, bins, lowerbounds, dims, flat=False):
+
+	data = np.asarray(data, dtype=float).reshape(-1, len(dims))
+	idx = np.empty(data.shape, dtype=int)
+	inside = np.ones(data.shape[0], dtype=bool)
+
+	for j in range(0, len(dims)):
+		idx[:, j] = np.searchsorted(bins[j], data[:, j], side='left')
+		inside &= (data[:, j] >= lowerbounds[j]) & (idx[:, j] < dims[j])
+
+	np.clip(idx, 0, np.array(dims)-1, out=idx)
+	if flat:
+		return np.ravel_multi_index(tuple(idx.T), dims), inside
+
+	return idx, inside
+
+# Report observations flagged outside the grid by locate
+# They are classified by the nearest edge bin unless strict is set, when they are left without a label
+def outside(inside, strict=False):
+
+	n = inside.size - np.count_nonzero(inside)
+	if n:
+		print("WARNING: " + str(n) + " observations lie outside the grid, " + ("labelled -1." if strict else "classified by the nearest edge bin."))
+
+	return n
+
+# Class labels of species codes, with -1 for empty bins, written as a string when the labels are strings
+def labels(classes, codes):
+
+	if np.all(codes != EMPTY):
+		return classes[codes]
+
+	fill = np.asarray('-1') if classes.dtype.kind in 'US' else np.asarray(-1).astype(classes.dtype)
+	return np.where(codes != EMPTY, classes[codes], fill)
+
+# Consecutive chunks of rows of an array, such as a memory-mapped file of observations
+# Only one chunk is read into memory at a time
+def chunks(data, rows):
+
+	for a in range(0, len(data), rows):
+		yield np.asarray(data[a:a+rows])
+
+# Daughters waiting to compete for bins, kept as flat arrays of bin index, species and fitness
+class brood():
+
+	def __init__(self):
+		self.daughters = []
+
+	def __len__(self):
+		return sum(d[0].size for d in self.daughters)
+
+	# Queue daughters in the order they were produced
+	# Species and fitness may be given once for the whole group
+	def add(self, pos, spec, fit):
+
+		pos = np.atleast_1d(np.asarray(pos, dtype=int))
+		self.daughters.append((pos, np.broadcast_to(np.asarray(spec, dtype=int), pos.shape), np.broadcast_to(np.asarray(fit, dtype=float), pos.shape)))
+
+	# Hand over all queued daughters and empty the brood
+	def gather(self):
+
+		if not self.daughters:
+			return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+
+		pos, spec, fit = (np.concatenate(x) for x in zip(*self.daughters))
+		self.daughters = []
+		return pos, spec, fit
+
+# Competition function - ensure one cell per space on the grid
+# Competitors are given as flat arrays of bin index, species and fitness in the order they entered their bins
+# The species with maximum overall fitness in a bin wins, ties going to the species that entered the bin first
+# Fitnesses of other species are subtracted from the winner
+# Returns the contested bins in ascending order with their winning species and net fitness
+def contest(pos, spec, fit, k):
+
+	if pos.size == 0:
+		return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+
+	if kernels.compiled:
+		return kernels.contest(pos, spec, fit, k)
+
+	# Sum fitness for every species in every bin, in the order competitors arrived
+	groups, first, inverse = np.unique(pos*k + spec, return_index=True, return_inverse=True)
+	sums = np.bincount(inverse.reshape(-1), weights=fit, minlength=groups.size)
+
+	# Arrange species groups in order of their first appearance
+	order = np.argsort(first)
+	gbin = groups[order] // k
+	gspec = groups[order] % k
+	gfit = sums[order]
+
+	# Total fitness of every bin summed over the species groups
+	bins, lead, binv = np.unique(gbin, return_index=True, return_inverse=True)
+	binsum = np.bincount(binv.reshape(-1), weights=gfit, minlength=bins.size)
+
+	# Pick the fittest group in every bin, earliest group first on ties
+	# A nan group can only win when it was first into the bin, matching a running max
+	lost = np.isnan(gfit)
+	forced = np.zeros(gfit.size, dtype=bool)
+	forced[lead] = lost[lead]
+	clean = np.where(lost, -np.inf, gfit)
+	ranked = np.lexsort((np.arange(gfit.size), -clean, ~forced, gbin))
+	win = ranked[np.r_[True, gbin[ranked][1:] != gbin[ranked][:-1]]]
+
+	return bins, gspec[win], 2*gfit[win] - binsum
+
+# Fitness totals and bin counts per species along with the total fitness of all bins
+def tally(spec, fit, k):
+
+	return np.bincount(spec, weights=fit, minlength=k), np.bincount(spec, minlength=k), np.sum(fit)
+
+# Running totals per species of a set of cells, one row each for the cell count, the sum and absolute sum of finite fitness, and the counts of nan, inf and -inf fitness
+# Totals of a changed grid follow by adding the totals of the new cells and subtracting those of the old ones
+def measure(spec, fit, k):
+
+	finite = np.isfinite(fit)
+	f = np.where(finite, fit, 0)
+	return np.stack((np.bincount(spec, minlength=k), np.bincount(spec, weights=f, minlength=k), np.bincount(spec, weights=np.absolute(f), minlength=k),
+		np.bincount(spec, weights=np.isnan(fit), minlength=k), np.bincount(spec, weights=fit == np.inf, minlength=k), np.bincount(spec, weights=fit == -np.inf, minlength=k))).astype(float)
+
+# Fitness totals and bin counts per species along with the total fitness of all bins, from running totals
+# Totals holding a nan, or both signs of infinity, are nan as a plain sum would be
+def tallies(totals):
+
+	def total(t):
+		count, finite, absolute, nan, pos, neg = t
+		with np.errstate(invalid='ignore'):
+			return np.where((nan > 0) | ((pos > 0) & (neg > 0)), np.nan, np.where(pos > 0, np.inf, np.where(neg > 0, -np.inf, finite)))
+
+	return total(totals), totals[0].astype(int), float(total(totals.sum(axis=1)))
+
+# Flat index of the bins at an offset from the given bins
+# Also returns a mask of the offset positions that are still on the grid
+def move(keys, offset, shape):
+
+	tgt = keys.copy()
+	ok = np.ones(keys.shape, dtype=bool)
+	for d in np.flatnonzero(offset):
+		coord = (keys // stride(shape, d)) % shape[d] + offset[d]
+		ok &= (coord >= 0) & (coord < shape[d])
+		tgt += offset[d]*stride(shape, d)
+
+	return tgt, ok
+
+# Bins within reach of the given bins through a stencil, including the bins themselves
+# Bins are marked on a mask of the whole grid when there are enough of them, and sorted otherwise
+def reach(keys, stencil, shape):
+
+	size = int(np.prod(shape))
+	if size <= 8*keys.size*(len(stencil) + 1):
+		mask = np.zeros(size, dtype=bool)
+		mask[keys] = True
+		for offset, w in stencil:
+			tgt, ok = move(keys, offset, shape)
+			mask[tgt[ok]] = True
+		return np.flatnonzero(mask)
+
+	found = [keys]
+	for offset, w in stencil:
+		tgt, ok = move(keys, offset, shape)
+		found.append(tgt[ok])
+
+	found = np.sort(np.concatenate(found))
+	return found[np.r_[True, found[1:] != found[:-1]]] if found.size else found
+
+# Bins that can change in the next generation given the bins that changed in the last one
+# A rule that reads its neighbors through the stencil more than once reaches that many steps out
+def affected(changed, stencil, shape, steps=1):
+
+	for i in range(steps):
+		changed = reach(changed, stencil, shape)
+
+	return changed
+
+# Summary of a change to a set of bins given their species and fitness before and after
+# Bins counts every bin that changed, grown counts empty bins that were taken, flips counts bins taken over by another species
+# Fitness is the total absolute change in fitness, leaving out bins whose change is not finite
+def changes(s0, f0, s1, f1):
+
+	with np.errstate(invalid='ignore'):
+		delta = np.absolute(f1 - f0)
+
+	return {'bins': s0.size,
+		'grown': int(np.count_nonzero((s0 == EMPTY) & (s1 != EMPTY))),
+		'flips': int(np.count_nonzero((s0 != EMPTY) & (s1 != EMPTY) & (s0 != s1))),
+		'fitness': float(delta[np.isfinite(delta)].sum())}
+
+# Ferment a culture until the grid stops changing or the iteration budget runs out
+# Stops on a fixed point, when at most a fraction tol of the occupied bins are taken or change species and fitness moves by at most a fraction tol of its total, or when a state from the last period generations repeats
+# Yields the cell totals of each generation and leaves the reason for stopping on the culture
+def incubate(culture, iterations, tol=None, period=0):
+
+	seen = dict()
+	culture.stopped = None
+	for i in range(iterations):
+
+		yield culture.ferment()
+		change = culture.change
+
+		if change['bins'] == 0:
+			culture.stopped = 'fixed point'
+			return
+
+		# Bins taken or flipped are measured against the occupied bins, fitness change against the total fitness held by the grid
+		if tol is not None:
+			totals = culture.grid.census(culture.classes.size).sum(axis=1)
+			if change['grown'] + change['flips'] <= tol*totals[0] and change['fitness'] <= tol*totals[2]:
+				culture.stopped = 'tolerance'
+				return
+
+		if period:
+			key = culture.grid.digest()
+			if key in seen and i - seen[key] <= period:
+				culture.stopped = 'cycle'
+				return
+			seen[key] = i
+
+# Grid storage shared by the dense and sparse layouts
+# Layouts provide occupied, lookup, write, todense and the nearest bin search used for predictions
+class grid():
+
+	# Bins whose species or fitness changed in the last competition or growth step, and a summary of the change
+	changed = None
+	change = None
+
+	# Daughters produced and bins contested in the last competition or growth step
+	produced = 0
+	resolved = 0
+
+	# Running totals per species of the occupied bins, see measure, and the first occupied bin of each species
+	# Kept up to date from the bins each step settles, and rebuilt from the whole grid once a write leaves them unknown
+	totals = None
+	first = None
+	stale = None
+
+	# Current occupants compete first, followed by daughters in the order they were produced
+	# Competition can be limited to a set of bins, leaving every other bin as it is
+	# Returns fitness totals and bin counts per species along with the total fitness of the grid
+	def compete(self, pos, spec, fit, k, within=None):
+
+		if within is None:
+			keys, s0, f0 = self.occupied()
+		else:
+			s0, f0 = self.lookup(within, np.zeros(len(self.shape), dtype=int))
+			keys, s0, f0 = within[s0 != EMPTY], s0[s0 != EMPTY], f0[s0 != EMPTY]
+
+		bins, win, net = contest(np.concatenate((keys, pos)), np.concatenate((s0, spec)), np.concatenate((f0, fit)), k)
+		self.produced = pos.size
+		self.settle(bins, win, net)
+
+		# Totals are counted afresh after a competition over the whole grid, so rounding in the running sums cannot build up
+		if within is None:
+			self.totals = None
+
+		return tallies(self.census(k))
+
+	# Running totals per species of the occupied bins, rebuilt from the whole grid when unknown
+	def census(self, k):
+
+		if self.totals is None or self.totals.shape[1] < k:
+			keys, spec, fit = self.occupied()
+			self.totals = measure(spec, fit, k)
+			self.first = np.full(k, int(np.prod(self.shape)))
+			np.minimum.at(self.first, spec, keys)
+			self.stale = np.zeros(k, dtype=bool)
+
+		return self.totals
+
+	# Bin counts of the species present, in order of their first occupied bin
+	# A species that lost its first bin is searched for from there, a block of bins at a time
+	def abundance(self, classes):
+
+		counts = self.census(classes.size)[0]
+		present = np.flatnonzero(counts > 0)
+		for s in present[self.stale[present]]:
+			start, step, size = self.first[s], 1024, int(np.prod(self.shape))
+			while start < size:
+				keys = np.arange(start, min(size, start + step))
+				hit = np.flatnonzero(self.lookup(keys, np.zeros(len(self.shape), dtype=int))[0] == s)
+				if hit.size:
+					self.first[s] = keys[hit[0]]
+					break
+				start, step = start + step, 2*step
+			self.stale[s] = False
+
+		order = present[np.argsort(self.first[present], kind='stable')]
+		return dict(zip(classes[order], counts[order].astype(int).tolist()))
+
+	# Fill empty bins by neighborhood majority, visiting only the neighbors of occupied bins
+	# Growth can be limited to a set of bins, leaving every other bin as it is
+	# Cells grown this way carry no fitness
+	def spread(self, stencil, k, within=None):
+
+		if within is None:
+			keys, species = self.occupied()[:2]
+		else:
+			targets = within[self.lookup(within, np.zeros(len(self.shape), dtype=int))[0] == EMPTY]
+			sources = reach(targets, stencil, self.shape)
+			found = self.lookup(sources, np.zeros(len(self.shape), dtype=int))[0]
+			keys, species = sources[found != EMPTY], found[found != EMPTY]
+
+		# Daughters for every empty neighbor, ordered by the cell that produced them
+		rank, pos, spec, fit = [], [], [], []
+		for q, (offset, w) in enumerate(stencil):
+			tgt, ok = move(keys, offset, self.shape)
+			ok &= self.lookup(keys, offset)[0] == EMPTY
+			if within is not None:
+				ok &= np.isin(tgt, within)
+
+			rank.append(np.flatnonzero(ok)*len(stencil) + q)
+			pos.append(tgt[ok])
+			spec.append(species[ok])
+			fit.append(np.full(np.count_nonzero(ok), float(w)))
+
+		order = np.argsort(np.concatenate(rank))
+		bins, win, net = contest(np.concatenate(pos)[order], np.concatenate(spec)[order], np.concatenate(fit)[order], k)
+		self.produced = order.size
+		self.settle(bins, win, np.zeros(bins.size))
+
+	# Write new states into the grid, noting which bins changed
+	# Fitness is compared bit for bit so that signed zeros and nan are tracked exactly
+	def settle(self, bins, spec, fit):
+
+		s0, f0 = self.lookup(bins, np.zeros(len(self.shape), dtype=int))
+		moved = (s0 != spec) | (f0.view(np.int64) != fit.view(np.int64))
+		self.changed = bins[moved]
+		self.change = changes(s0[moved], f0[moved], spec[moved], fit[moved])
+		self.resolved = bins.size
+
+		# Running totals follow the changed bins
+		totals = self.totals
+		if totals is not None:
+			k = totals.shape[1]
+			keys, s0, f0, s1, f1 = bins[moved], s0[moved], f0[moved], spec[moved], fit[moved]
+			if np.any(s1 >= k):
+				totals = None
+			else:
+				totals = totals + measure(s1[s1 != EMPTY], f1[s1 != EMPTY], k) - measure(s0[s0 != EMPTY], f0[s0 != EMPTY], k)
+				lost = (s0 != EMPTY) & (s0 != s1)
+				gained = (s1 != EMPTY) & (s0 != s1)
+				stale = self.stale.copy()
+				stale[s0[lost][self.first[s0[lost]] == keys[lost]]] = True
+				first = self.first.copy()
+				np.minimum.at(first, s1[gained], keys[gained])
+				stale &= first == self.first
+
+		self.write(bins, spec, fit)
+		if totals is not None:
+			self.totals, self.first, self.stale = totals, first, stale
+
+	# Fingerprint of the species and fitness of every occupied bin, used to spot repeated states
+	def digest(self):
+
+		keys, spec, fit = self.occupied()
+		h = hashlib.blake2b(digest_size=16)
+		for a in (keys, spec, fit):
+			h.update(np.ascontiguousarray(a).tobytes())
+
+		return h.hexdigest()
+
+# Dense grid storage - one species code and fitness per bin
+class dense(grid):
+
+	def __init__(self, shape):
+
+		self.shape = tuple(shape)
+		self.species = np.full(self.shape, EMPTY, dtype=int)
+		self.fitness = np.zeros(self.shape)
+		self.table = None
+
+	# Flat index, species and fitness of every occupied bin in scan order
+	def occupied(self):
+
+		keys = np.flatnonzero(self.species != EMPTY)
+		return keys, self.species.reshape(-1)[keys], self.fitness.reshape(-1)[keys]
+
+	# Species and fitness of the bins at an offset from the given bins
+	# Bins off the edge of the grid read as empty
+	def lookup(self, keys, offset):
+
+		tgt, ok = move(keys, offset, self.shape)
+		spec = np.full(keys.shape, EMPTY, dtype=int)
+		fit = np.zeros(keys.shape)
+		spec[ok] = self.species.reshape(-1)[tgt[ok]]
+		fit[ok] = self.fitness.reshape(-1)[tgt[ok]]
+
+		return spec, fit
+
+	# Set the species and fitness of the given bins
+	def write(self, bins, spec, fit):
+
+		self.table = None
+		self.totals = None
+		self.species.reshape(-1)[bins] = spec
+		self.fitness.reshape(-1)[bins] = fit
+
+	# Fill empty bins by neighborhood majority
+	# Without a limiting set of bins the neighborhood counts are taken over the whole grid at once
+	def spread(self, stencil, k, within=None):
+
+		if within is not None:
+			return grid.spread(self, stencil, k, within)
+
+		grown = spread(self.species, stencil, k)
+		self.totals = None
+		self.changed = np.flatnonzero(grown != self.species)
+		self.change = changes(np.full(self.changed.size, EMPTY), np.zeros(self.changed.size), grown.reshape(-1)[self.changed], np.zeros(self.changed.size))
+		self.table = None
+		self.species = grown
+
+		# Neighborhoods are scored over the whole grid at once, so only the bins taken are counted
+		self.produced = self.resolved = self.changed.size
+
+	# Build the nearest occupied bin table used for predictions
+	def freeze(self):
+
+		self.table = nearest(self.species)
+
+	# Whether the prediction table matches the grid
+	def frozen(self):
+
+		return self.table is not None
+
+	# Species of the given bins, taken from the nearest occupied bin once frozen
+	def nearest(self, keys):
+
+		if self.table is None:
+			self.freeze()
+
+		return self.table.reshape(-1)[keys]
+
+	# Full species and fitness grids
+	def todense(self):
+
+		return self.species, self.fitness
+
+# Sparse grid storage - only occupied bins are kept, as flat indices in ascending order with their species and fitness
+# Memory grows with the number of occupied bins instead of the size of the grid
+class sparse(grid):
+
+	def __init__(self, shape):
+
+		self.shape = tuple(shape)
+		self.keys = np.zeros(0, dtype=int)
+		self.species = np.zeros(0, dtype=int)
+		self.fitness = np.zeros(0)
+		self.tree = None
+
+	# Flat index, species and fitness of every occupied bin in scan order
+	def occupied(self):
+
+		return self.keys, self.species, self.fitness
+
+	# Species and fitness of the bins at an offset from the given bins
+	# Bins off the edge of the grid read as empty
+	def lookup(self, keys, offset):
+
+		tgt, ok = move(keys, offset, self.shape)
+		spec = np.full(keys.shape, EMPTY, dtype=int)
+		fit = np.zeros(keys.shape)
+
+		if self.keys.size:
+			at = np.minimum(np.searchsorted(self.keys, tgt), self.keys.size-1)
+			found = ok & (self.keys[at] == tgt)
+			spec[found] = self.species[at[found]]
+			fit[found] = self.fitness[at[found]]
+
+		return spec, fit
+
+	# Set the species and fitness of the given bins, which must be in ascending order
+	# Bins not yet occupied are inserted so the flat indices stay sorted
+	def write(self, bins, spec, fit):
+
+		self.tree = None
+		self.totals = None
+		at = np.searchsorted(self.keys, bins)
+		held = np.zeros(bins.size, dtype=bool)
+		held[at < self.keys.size] = self.keys[at[at < self.keys.size]] == bins[at < self.keys.size]
+
+		self.species[at[held]] = spec[held]
+		self.fitness[at[held]] = fit[held]
+		self.keys = np.insert(self.keys, at[~held], bins[~held])
+		self.species = np.insert(self.species, at[~held], spec[~held])
+		self.fitness = np.insert(self.fitness, at[~held], fit[~held])
+
+	# Build the nearest occupied bin search tree used for predictions
+	def freeze(self):
+
+		self.tree = spatial.cKDTree(np.stack(np.unravel_index(self.keys, self.shape), axis=1))
+
+	# Whether the search tree matches the grid
+	def frozen(self):
+
+		return self.tree is not None
+
+	# Species of the given bins, taken from the nearest occupied bin once frozen
+	def nearest(self, keys):
+
+		if self.tree is None:
+			self.freeze()
+
+		spec = self.lookup(keys, np.zeros(len(self.shape), dtype=int))[0]
+		empty = spec == EMPTY
+		if np.any(empty) and self.keys.size:
+			spec[empty] = self.species[self.tree.query(np.stack(np.unravel_index(keys[empty], self.shape), axis=1))[1]]
+
+		return spec
+
+	# Full species and fitness grids
+	# Only practical when the whole grid fits in memory
+	def todense(self):
+
+		species = np.full(self.shape, EMPTY, dtype=int)
+		fitness = np.zeros(self.shape)
+		species.reshape(-1)[self.keys] = self.species
+		fitness.reshape(-1)[self.keys] = self.fitness
+		return species, fitness
+
+# Bins of a finer grid covered by occupied bins of a coarser grid
+# Maps give the coarse bin holding each fine bin along every axis, and must be in ascending order
+# Returns the fine bins in ascending order with the species and fitness of the coarse bin covering them
+def upsample(keys, spec, fit, coarse, fine, maps):
+
+	coords = np.stack(np.unravel_index(keys, coarse), axis=1)
+	rows = np.arange(keys.size)
+	found = []
+	for j in range(len(coarse)):
+
+		# Each coarse bin covers a run of fine bins along the axis, repeated for every fine bin already found
+		start = np.searchsorted(maps[j], coords[rows, j], side='left')
+		count = np.searchsorted(maps[j], coords[rows, j], side='right') - start
+		within = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+
+		found = [f[np.repeat(np.arange(rows.size), count)] for f in found]
+		found.append(np.repeat(start, count) + within)
+		rows = np.repeat(rows, count)
+
+	flat = np.ravel_multi_index(tuple(found), fine) if found else np.zeros(0, dtype=int)
+	order = np.argsort(flat)
+
+	return flat[order], spec[rows[order]], fit[rows[order]]
+
+# Stencil over some of the axes of a grid, with no offset along the others
+def embed(stencil, axes, ndim):
+
+	found = []
+	for offset, w in stencil:
+		full = np.zeros(ndim, dtype=int)
+		full[list(axes)] = offset
+		found.append((full, w))
+
+	return found
+
+# Create dictionary to track cell totals, ordered by first appearance on the grid
+def abundance(species, classes):
+
+	codes, first, counts = np.unique(species[species != EMPTY], return_index=True, return_counts=True)
+	order = np.argsort(first)
+	return dict(zip(classes[codes[order]], counts[order].tolist()))
+
+# Offsets and weights of the Moore neighborhood grown by the baseline cultures
+# Face neighbors are reached once, neighbors diagonal across two axes are reached twice
+def moore(n):
+
+	stencil = vonneumann(n)
+	for d1 in range(0, n):
+		for d2 in range(d1+1, n):
+			for s1 in (-1, 1):
+				for s2 in (-1, 1):
+					offset = np.zeros(n, dtype=int)
+					offset[d1] = s1
+					offset[d2] = s2
+					stencil.append((offset, 2))
+
+	return stencil
+
+# Offsets and weights of the von Neumann neighborhood
+def vonneumann(n):
+
+	stencil = []
+	for d in range(0, n):
+		for s in (-1, 1):
+			offset = np.zeros(n, dtype=int)
+			offset[d] = s
+			stencil.append((offset, 1))
+
+	return stencil
+
+# Fill empty bins with the species that has the most cells in the surrounding stencil
+# Neighborhood cell counts are taken one species at a time over the whole grid
+# Ties go to the species whose earliest neighbor in a bin by bin scan comes first, as if cells were added to bins in scan order
+def spread(species, stencil, k):
+
+	empty = species == EMPTY
+	flat = np.arange(species.size).reshape(species.shape)
+	strides = np.array([stride(species.shape, d) for d in range(species.ndim)], dtype=int)
+
+	# Species of the cell each bin could receive a daughter from through every stencil offset
+	sources = [(shifted(species, -offset, EMPTY), offset.dot(strides), w) for offset, w in stencil]
+
+	# Score combines the neighbor count with the position of the first neighbor to break ties
+	grown = np.full(species.shape, EMPTY, dtype=int)
+	best = np.zeros(species.shape, dtype=int)
+	for s in range(0, k):
+
+		count = np.zeros(species.shape, dtype=int)
+		first = np.full(species.shape, species.size)
+		for source, step, w in sources:
+			hit = source == s
+			count += w*hit
+			first = np.where(hit, np.minimum(first, flat - step), first)
+
+		score = count*(species.size + 1) - first
+		better = (count > 0) & (score > best)
+		grown[better] = s
+		best[better] = score[better]
+
+	return np.where(empty, grown, species)
+
+# Fill every empty bin with the species of the nearest occupied bin on the grid
+# Distances are measured in bins using a Euclidean distance transform
+def nearest(species):
+
+	empty = species == EMPTY
+	if np.all(empty) or not np.any(empty):
+		return species.copy()
+
+	idx = ndimage.distance_transform_edt(empty, return_distances=False, return_indices=True)
+	return species[tuple(idx)]
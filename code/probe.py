@@ -0,0 +1,77 @@
+'''
+This script holds the probe used to instrument cultures.  It should not be run directly.
+
+A probe attached to a culture as culture.probe times the phases of every step and counts the work done in them, then hands one record per step to an optional callback.  Cultures without a probe skip all of this, so instrumentation costs nothing unless it is asked for.
+'''
+
+# Standard Imports
+import json
+import time
+
+# Phase timers and work counters of a culture
+# Every inoculation, partial fit and generation leaves one record, kept in self.records unless keep is unset, and passed to callback when given
+# Timed phases do not overlap, so they add up to at most the time of the step
+class probe():
+
+	def __init__(self, callback=None, keep=True):
+
+		self.callback = callback
+		self.keep = keep
+		self.records = []
+		self.generation = 0
+		self.start()
+
+	# Start the timers and counters of a new step
+	def start(self):
+
+		self.timers = dict()
+		self.counters = dict()
+		self.began = time.perf_counter()
+
+	# Add the time since start to a phase
+	def time(self, phase, start):
+
+		self.timers[phase] = self.timers.get(phase, 0.0) + time.perf_counter() - start
+
+	# Add n to a counter
+	def count(self, name, n):
+
+		self.counters[name] = self.counters.get(name, 0) + int(n)
+
+	# Close the current step with the cell totals and change it left
+	# Generations are numbered from one, inoculation and partial fits carry the number of the last generation
+	def finish(self, step, abundance, change):
+
+		if step == 'ferment':
+			self.generation += 1
+
+		record = {'step': step, 'generation': self.generation, 'time': time.perf_counter() - self.began,
+			'timers': self.timers, 'counters': self.counters, 'abundance': abundance, 'change': change}
+
+		if self.keep:
+			self.records.append(record)
+		if self.callback is not None:
+			self.callback(record)
+
+		return record
+
+	# Timers and counters summed over every kept record
+	def summary(self):
+
+		timers, counters = dict(), dict()
+		for record in self.records:
+			for phase, t in record['timers'].items():
+				timers[phase] = timers.get(phase, 0.0) + t
+			for name, n in record['counters'].items():
+				counters[name] = counters.get(name, 0) + n
+
+		return {'steps': len(self.records), 'time': sum(record['time'] for record in self.records), 'timers': timers, 'counters': counters}
+
+	# Write the kept records to a file, one JSON object per line
+	# Class labels become strings so they can be used as keys
+	def save(self, path):
+
+		with open(path, 'w') as f:
+			for record in self.records:
+				record = dict(record, abundance={str(label): int(n) for label, n in record['abundance'].items()})
+				f.write(json.dumps(record) + '\n')
@@ -0,0 +1,131 @@
+'''
+This script records how the grid of a culture evolves so it can be replayed without training again.  It should not be run directly.
+
+A recorder attached to a culture as culture.recorder takes one frame per inoculation, partial fit and generation.  Most frames hold only the bins that changed, with their new species and fitness, and every so often a keyframe holds every occupied bin so a replay can start close to any generation.  Frames are saved together as one compressed NumPy archive, and a replay rebuilds the grids of any frame from the keyframe before it.
+'''
+
+# Standard Imports
+import numpy as np
+
+# Shared grid operations
+from petri import EMPTY
+
+# Frames of a culture's grid, kept in memory until saved
+# A keyframe is taken on the first frame and then every interval frames
+class recorder():
+
+	def __init__(self, interval=25):
+
+		self.interval = interval
+		self.shape = None
+		self.classes = None
+		self.steps = []
+		self.keyframes = []
+		self.frames = []
+		self.last = None
+
+	def __len__(self):
+		return len(self.frames)
+
+	# Take a frame of the culture after a step, as a keyframe when key is set or one is due
+	# Other frames hold the bins the step changed
+	# Every frame must come from a grid of the same shape, so a refined culture needs a recorder of its own
+	def capture(self, culture, step, key=False):
+
+		grid = culture.grid
+		if self.shape is not None and tuple(grid.shape) != self.shape:
+			raise ValueError("Recorded grid has shape " + str(self.shape) + ", culture grid has shape " + str(tuple(grid.shape)))
+
+		key = key or self.last is None or len(self.frames) - self.last >= self.interval
+
+		if key:
+			self.last = len(self.frames)
+			bins, spec, fit = grid.occupied()
+		else:
+			bins = grid.changed
+			spec, fit = grid.lookup(bins, np.zeros(len(grid.shape), dtype=int))
+
+		self.frames.append((np.array(bins), np.array(spec), np.array(fit)))
+		self.keyframes.append(key)
+		self.steps.append(step)
+		self.shape = tuple(grid.shape)
+		self.classes = culture.classes
+
+	# Every frame as flat arrays, with the number of bins in each frame
+	def arrays(self):
+
+		if not self.frames:
+			raise ValueError("Nothing has been recorded")
+
+		bins, spec, fit = (np.concatenate(a) for a in zip(*self.frames))
+		return {'shape': np.array(self.shape), 'classes': np.asarray(self.classes), 'steps': np.array(self.steps),
+			'keyframes': np.array(self.keyframes), 'lengths': np.array([f[0].size for f in self.frames]),
+			'bins': bins, 'species': spec, 'fitness': fit}
+
+	# Save every frame to a compressed archive that load can replay
+	def save(self, path):
+
+		np.savez_compressed(path, **self.arrays())
+
+	# Replay of the frames recorded so far
+	def replay(self):
+
+		return replay(self.arrays())
+
+# Load a replay of frames saved by a recorder
+def load(path):
+
+	with np.load(path, allow_pickle=False) as f:
+		return replay({name: f[name] for name in f.files})
+
+# Grids of recorded frames, rebuilt on request
+# Moving forward applies only the frames in between, moving back starts again from the nearest keyframe
+class replay():
+
+	def __init__(self, arrays):
+
+		self.shape = tuple(arrays['shape'].tolist())
+		self.classes = arrays['classes']
+		self.steps = arrays['steps']
+		self.keyframes = arrays['keyframes']
+		self.offsets = np.concatenate(([0], np.cumsum(arrays['lengths'])))
+		self.bins, self.spec, self.fit = arrays['bins'], arrays['species'], arrays['fitness']
+
+		self.position = None
+		self.species = np.full(self.shape, EMPTY, dtype=int)
+		self.fitness = np.zeros(self.shape)
+
+	def __len__(self):
+		return self.keyframes.size
+
+	# Apply one frame to the current grids
+	def apply(self, i):
+
+		if self.keyframes[i]:
+			self.species[...] = EMPTY
+			self.fitness[...] = 0
+
+		a, b = self.offsets[i], self.offsets[i+1]
+		self.species.reshape(-1)[self.bins[a:b]] = self.spec[a:b]
+		self.fitness.reshape(-1)[self.bins[a:b]] = self.fit[a:b]
+		self.position = i
+
+	# Species code and fitness grids as they were after frame i
+	# Negative frames count back from the last one
+	def seek(self, i):
+
+		i = range(len(self))[i]
+		start = np.flatnonzero(self.keyframes[:i+1])[-1]
+		if self.position is None or not start <= self.position <= i:
+			self.apply(start)
+
+		for j in range(self.position + 1, i + 1):
+			self.apply(j)
+
+		return self.species.copy(), self.fitness.copy()
+
+	# Grids of every frame in order
+	def __iter__(self):
+
+		for i in range(len(self)):
+			yield self.seek(i)
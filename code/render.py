@@ -0,0 +1,116 @@
+'''
+This script draws images of 2-D cultures for the animation and comparison scripts.  It should not be run directly.
+
+Every bin is coloured with one lookup into a palette indexed by species code, with empty bins taking the last entry, so a frame costs a few array operations however large the grid.  A microscope runs the simulation in a background thread and hands rendered frames over through a bounded queue, so drawing never holds up fermentation and fermentation never runs far ahead of drawing.
+'''
+
+# Standard Imports
+import os
+import queue
+import threading
+import numpy as np
+
+# Shared grid operations
+from petri import EMPTY
+
+# Fitness shares are clipped to this range before shading, as a share of the total fitness of the grid
+SHADE = (0.0005, 0.0022)
+
+# Colour masks for k species, one row per species followed by a white row for empty bins
+# The first three species are pure red, green and blue, any further species cycle through their mixes
+def palette(k):
+
+	mixes = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0], [1, 0, 1], [0, 1, 1]], dtype=float)
+	return np.concatenate((mixes[np.arange(k) % len(mixes)], np.ones((1, 3))))
+
+# RGB image of a 2-D grid of species codes, with the first axis across and the second axis up
+# Without fitness every species is drawn at full strength on black
+# With fitness, channels outside a species' colour grow lighter as its share of the total fitness falls, bins with no defined share being lightest
+def image(species, k, fitness=None, total=1):
+
+	mask = palette(k)[np.where(species == EMPTY, k, species)]
+	if fitness is None:
+		shade = np.zeros(species.shape)
+	else:
+		with np.errstate(divide='ignore', invalid='ignore'):
+			shade = 255 - 100000*np.clip(np.nan_to_num(fitness/total, nan=SHADE[0]), *SHADE)
+
+	rgb = np.where(mask == 1, 255, shade[..., None])
+	return np.flipud(np.swapaxes(rgb, 0, 1)).astype('uint8')
+
+# Image of a 2-D culture, shaded by fitness when its rule carries fitness
+def snapshot(culture):
+
+	species, fitness = culture.grid.todense()
+	if culture.rule.weighted:
+		return image(species, culture.classes.size, fitness, culture.totalfitness)
+
+	return image(species, culture.classes.size)
+
+# Background fermentation of a 2-D culture feeding a bounded queue of frames
+# Iterating yields the generation number, cell totals and image of every generation in order
+# Runs for the given number of generations, or until stopped when generations is None
+class microscope():
+
+	def __init__(self, culture, generations=None, depth=8):
+
+		self.culture = culture
+		self.generations = generations
+		self.frames = queue.Queue(depth)
+		self.halt = threading.Event()
+		self.thread = threading.Thread(target=self.produce, daemon=True)
+		self.thread.start()
+
+	# Producer loop, a finished run is marked by None and a failed one by the exception it raised
+	def produce(self):
+
+		end = None
+		try:
+			i = 0
+			while not self.halt.is_set() and (self.generations is None or i < self.generations):
+				abundance = self.culture.ferment()
+				i += 1
+				if not self.put((i, abundance, snapshot(self.culture))):
+					return
+		except Exception as error:
+			end = error
+		finally:
+			self.put(end)
+
+	# Wait for room in the queue, giving up once stopped
+	def put(self, frame):
+
+		while not self.halt.is_set():
+			try:
+				self.frames.put(frame, timeout=0.1)
+				return True
+			except queue.Full:
+				pass
+
+		return False
+
+	def __iter__(self):
+
+		while True:
+			frame = self.frames.get()
+			if frame is None:
+				return
+			if isinstance(frame, Exception):
+				raise frame
+			yield frame
+
+	# Stop the producer after the generation it is running
+	def stop(self):
+
+		self.halt.set()
+		self.thread.join()
+
+# Ferment a 2-D culture and write one PNG per generation to a directory, without drawing anything on screen
+# Frames are written while the next generations run
+def export(culture, generations, directory, depth=8):
+
+	import matplotlib.pyplot as plt
+
+	os.makedirs(directory, exist_ok=True)
+	for i, abundance, img in microscope(culture, generations, depth):
+		plt.imsave(os.path.join(directory, 'frame%05d.png' % i), img)
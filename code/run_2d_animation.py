@@ -1,52 +1,30 @@
 '''
 This Script is a RUN function which shows an animated progression of cell growth in the cellular automation defined in 'biosystem.py'.  Data is drawn randomly over a rectangular space.  Then, the function y=x**2 is used as a boundary to classify data into two categories.  Cellular automation is run with the initial dataset to determine how accurately the y=x**2 boundary can be reproduced.
+
+The simulation runs in the background and frames are drawn as they arrive.  Given a directory as its argument, the script instead writes a fixed number of frames there as PNG files without opening a window.
 '''
 
 # Standard Imports
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from sklearn.model_selection import train_test_split
 
 # Biosystem Import
-import biosystem
+import render
 from biosystem import culture
 
 # Update function for the animation
-def display2D(frameNum, mf, luca):
+# Frames come from the background simulation, already rendered
+def display2D(frame, mf):
 
-	# Iteration of the simulation and update status to console
-	a = luca.ferment()
+	# Update status to console
+	i, a, img = frame
 	print(a)
 
-	# Set a cell variable
-	bins = luca.cells
-	
-	# Determine 2D dimensions
-	xdim = len(bins)
-	ydim = len(bins[0])
-	
-	# Construct the animation image
-	img = biosystem.empties([xdim, ydim])
-	for i in range(0, xdim):
-		for j in range(0, ydim):
-			if bins[i][j]:
-				s = bins[i][j][0].species
-				f = bins[i][j][0].fitness
-				
-				f = f/luca.totalfitness
-				if f > 0.0022: f = 0.0022
-				if f < 0.0005: f = 0.0005
-				
-				rgb = (np.ones(3)*(255 - 100000*f)).tolist()
-				rgb[int(s)] = 255
-				
-				img[ydim-1-j][i] = rgb
-			else:
-				img[ydim-1-j][i] = [255,255,255]
-	
 	# Iterate the animation
-	mf.set_data(np.array(img, dtype='uint8'))
+	mf.set_data(img)
 	return mf,
 	
 if __name__ == "__main__":
@@ -58,6 +36,7 @@ if __name__ == "__main__":
 	# Important simulation parameters
 	n = 100 # Number of datapoints in initial set
 	m = 30 # Size of cell grid
+	frames = 200 # Number of frames written when exporting
 	
 	# Create system
 	luca = culture([m, m])
@@ -77,11 +56,18 @@ if __name__ == "__main__":
 	# Initialization of cell positions
 	luca.inoculate(XT,YT)
 	
-	# Driving forward of animation also drives the simulation forward
+	# Headless runs export frames as fast as the simulation produces them
+	if len(sys.argv) > 1:
+		render.export(luca, frames, sys.argv[1])
+		quit()
+
+	# Simulation runs ahead of the animation by at most a few frames
 	fig, ax = plt.subplots() 
 	ax.set_yticklabels([])
 	ax.set_xticklabels([])
 	img = ax.imshow(np.zeros([m,m,3]))
-	ani = animation.FuncAnimation(fig, display2D, fargs=(img, luca, ), interval=1)
+	scope = render.microscope(luca)
+	ani = animation.FuncAnimation(fig, display2D, frames=iter(scope), fargs=(img, ), interval=1, cache_frame_data=False)
 	plt.show()
+	scope.stop()
 	
\ No newline at end of file
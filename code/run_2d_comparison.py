@@ -5,11 +5,10 @@ This Script is a RUN function for the comparison of image results from the "grad
 # Standard Imports
 import numpy as np
 import matplotlib.pyplot as plt
-from copy import deepcopy
 from sklearn.model_selection import train_test_split
 
 # Separate Biosystems for the purposes of these tests
-import biosystem
+import render
 from biosystem import culture
 from vonneumann_biosystem import culture as vnCult
 from moore_biosystem import culture as mCult
@@ -64,48 +63,11 @@ if __name__ == "__main__":
 			print(c)
 			print("")
 	
-	# Create image arrays
-	img = deepcopy(biosystem.empties([m, m]))
-	imgVN = deepcopy(biosystem.empties([m, m]))
-	imgM = deepcopy(biosystem.empties([m, m]))
-	
-	# Set variables to model results
-	bins = luca.cells
-	binsVN = lucaVN.cells
-	binsM = lucaM.cells
-	
 	# Build images for each simulation type
-	for i in range(0, m):
-		for j in range(0, m):
-			
-			if bins[i][j]:
-				s = bins[i][j][0].species
-				rgb = (np.zeros(3)).tolist()
-				rgb[int(s)] = 255
-				img[m-1-j][i] = rgb
-			else:
-				img[m-1-j][i] = [255,255,255]
-				
-			if binsVN[i][j]:
-				s = binsVN[i][j][0].species
-				rgb = (np.zeros(3)).tolist()
-				rgb[int(s)] = 255
-				imgVN[m-1-j][i] = rgb
-			else:
-				imgVN[m-1-j][i] = [255,255,255]
-				
-			if binsM[i][j]:
-				s = binsM[i][j][0].species
-				rgb = (np.zeros(3)).tolist()
-				rgb[int(s)] = 255
-				imgM[m-1-j][i] = rgb
-			else:
-				imgM[m-1-j][i] = [255,255,255]
-	
-	# Convert image arrays to appropriate data types
-	img = np.array(img, dtype='uint8')
-	imgVN = np.array(imgVN, dtype='uint8')
-	imgM = np.array(imgM, dtype='uint8')
+	# Species are drawn at full strength, empty bins in white
+	img = render.image(luca.species, luca.classes.size)
+	imgVN = render.image(lucaVN.species, lucaVN.classes.size)
+	imgM = render.image(lucaM.species, lucaM.classes.size)
 	
 	# Show the results
 	fig, (ax1, ax2, ax3, ax4) = plt.subplots(1, 4, figsize=(14, 3))
@@ -0,0 +1,180 @@
+'''
+This Script is a RUN function which times every phase of a culture for the gradient, Moore and von Neumann growth rules on seeded synthetic data.  Grid size, number of dimensions, training set size and number of classes are each swept in turn around a default case, giving a scaling curve for every setting.
+
+Results are saved to benchmark_results.json.  When benchmark_baseline.json exists, every phase is compared against it and slower phases are reported as regressions.  Run with --baseline to store the results as the new baseline.
+'''
+
+# Standard Imports
+import os
+import sys
+import json
+import time
+import platform
+import numpy as np
+from sklearn.datasets import make_blobs
+
+# Classifier Imports
+import probe
+import kernels
+from cultures import rules
+
+# Phases timed for every case, in the order they run
+# Compete is read from a probe and its time is also counted within inoculate and ferment, so its regressions show on their own
+phases = ['build', 'inoculate', 'ferment', 'compete', 'freeze', 'harvest']
+
+# Time every phase of one culture trained on seeded data
+# Each phase keeps its fastest time over the given number of repeats
+def bench(rule, m, d, n, k, iterations, repeats, seed):
+
+	X, Y = make_blobs(n_samples=2*n, n_features=d, centers=k, cluster_std=2.0, random_state=seed)
+	X_train, X_test, Y_train = X[:n], X[n:], Y[:n]
+
+	best = {phase: float('inf') for phase in phases}
+	for r in range(repeats):
+
+		times = dict()
+		start = time.perf_counter()
+		luca = rules[rule]([m]*d)
+		times['build'] = time.perf_counter() - start
+		luca.probe = probe.probe()
+
+		start = time.perf_counter()
+		luca.inoculate(X_train, Y_train)
+		times['inoculate'] = time.perf_counter() - start
+
+		start = time.perf_counter()
+		for i in range(iterations):
+			luca.ferment()
+		times['ferment'] = time.perf_counter() - start
+		times['compete'] = luca.probe.summary()['timers'].get('compete', 0.0)
+
+		start = time.perf_counter()
+		luca.freeze()
+		times['freeze'] = time.perf_counter() - start
+
+		start = time.perf_counter()
+		accuracy = np.mean(luca.harvest(X_test) == Y[n:])
+		times['harvest'] = time.perf_counter() - start
+
+		for phase in phases:
+			best[phase] = min(best[phase], times[phase])
+
+	return dict({'rule': rule, 'm': m, 'd': d, 'n': n, 'k': k, 'accuracy': accuracy}, **best)
+
+# Key matching a case across runs
+def case(row):
+
+	return (row['rule'], row['m'], row['d'], row['n'], row['k'])
+
+# Compare results with a baseline run
+# A phase regresses when it is slower by more than the tolerance ratio and by at least floor seconds
+# Returns one line per regression
+def compare(results, baseline, tolerance, floor):
+
+	before = {case(row): row for row in baseline['results']}
+	regressions = []
+	for row in results:
+		if case(row) not in before:
+			continue
+
+		for phase in phases:
+			old, new = before[case(row)][phase], row[phase]
+			if new > old*tolerance and new - old > floor:
+				regressions.append("%-10s m=%-3d d=%d n=%-6d k=%-2d %-9s %8.4f -> %8.4f  (x%.2f)" % (case(row) + (phase, old, new, new/old)))
+
+	return regressions
+
+if __name__ == "__main__":
+
+	# Ignore warnings
+	import warnings
+	warnings.simplefilter("ignore")
+
+	# Start tracking time
+	start_me = time.time()
+
+	# Print header
+	print("")
+	print("#############################################")
+	print("  Pseudo Cellular Automation Benchmarks      ")
+	print("           Author: Branden Keck              ")
+	print("#############################################")
+	print("")
+
+	# Important simulation variables
+	# Each setting is swept in turn while the others keep their default
+	defaults = {'m': 12, 'd': 3, 'n': 1000, 'k': 3}
+	sweeps = {'m': [6, 12, 24, 48], 'd': [2, 3, 4, 5], 'n': [250, 1000, 4000, 16000], 'k': [2, 3, 5, 8]}
+	iterations = 10
+	repeats = 3
+	seed = 0
+
+	# Regressions are phases slower than the baseline by a quarter and by at least 20 ms, so timer noise on the smallest cases is not reported
+	tolerance = 1.25
+	floor = 0.02
+	results_path = 'benchmark_results.json'
+	baseline_path = 'benchmark_baseline.json'
+	failed = False
+
+	# Every distinct case, in sweep order
+	cases = []
+	for setting, values in sweeps.items():
+		for value in values:
+			settings = dict(defaults, **{setting: value})
+			if (settings['m'], settings['d'], settings['n'], settings['k']) not in cases:
+				cases.append((settings['m'], settings['d'], settings['n'], settings['k']))
+
+	# Warm up every rule once so loading compiled kernels is not timed
+	for rule in rules:
+		bench(rule, 6, 2, 100, 2, 2, 1, seed)
+
+	# Time every case with every rule
+	print("Timing " + str(len(cases)*len(rules)) + " Cases...")
+	print("")
+	print("%-10s  %3s  %2s  %6s  %2s  %8s" % ('rule', 'm', 'd', 'n', 'k', 'accuracy') + "  %9s"*len(phases) % tuple(phases))
+	results = []
+	for m, d, n, k in cases:
+		for rule in rules:
+			row = bench(rule, m, d, n, k, iterations, repeats, seed)
+			results.append(row)
+			print("%-10s  %3d  %2d  %6d  %2d  %8.4f" % tuple(row[key] for key in ('rule', 'm', 'd', 'n', 'k', 'accuracy')) + "  %9.4f"*len(phases) % tuple(row[phase] for phase in phases))
+	print("")
+
+	# Save results with the settings and environment they were taken in
+	run = {
+		'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'compiled': kernels.compiled, 'machine': platform.machine(), 'cpus': os.cpu_count()},
+		'settings': {'defaults': defaults, 'sweeps': sweeps, 'iterations': iterations, 'repeats': repeats, 'seed': seed},
+		'results': results,
+	}
+	with open(results_path, 'w') as f:
+		json.dump(run, f, indent=1)
+	print("Results saved to " + results_path)
+
+	if '--baseline' in sys.argv[1:]:
+		with open(baseline_path, 'w') as f:
+			json.dump(run, f, indent=1)
+		print("Baseline saved to " + baseline_path)
+
+	# Compare against the stored baseline
+	elif os.path.exists(baseline_path):
+		with open(baseline_path) as f:
+			baseline = json.load(f)
+
+		if baseline['settings'] != run['settings']:
+			print("WARNING: Baseline was taken with different settings, only matching cases are compared.")
+
+		regressions = compare(results, baseline, tolerance, floor)
+		print("")
+		print("REGRESSIONS: " + str(len(regressions)))
+		for line in regressions:
+			print(line)
+		failed = len(regressions) > 0
+
+	# Print run time
+	print("")
+	end_me = time.time() - start_me
+	print("Run Time:")
+	print(end_me)
+
+	# Exit with an error when any phase regressed, so the run can gate an upgrade
+	sys.exit(1 if failed else 0)
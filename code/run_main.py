@@ -34,6 +34,7 @@ if __name__ == "__main__":
 	# Important simulation variables
 	m = 12
 	iter = 50
+	tol = 0.05 # Stop once a generation changes less than this fraction of the bins and of the total fitness
 	
 	print("Initializing Cell Culture...")
 	print("")
@@ -53,17 +54,21 @@ if __name__ == "__main__":
 	luca.inoculate(X_train, Y_train)
 	
 	# Iteration cycles
+	# Training stops early once the grid settles, reaches a fixed point or starts repeating itself
 	print("Training...  Printing Totals...")
 	print("")
-	for i in range(iter):
-		a = luca.ferment()
+	for a in luca.ferment_until(iter, tol=tol, period=4):
 		print(a)
+	if luca.stopped is not None:
+		print("Stopped early: " + luca.stopped)
 	
 	print("")
 	print("Creating Predictions...")
 	print("")
 	
 	# Draw predictions
+	# Grid is frozen first so that test points in empty bins take the nearest species
+	luca.freeze()
 	Y0 = luca.harvest(X_test)
 	correct = 0
 	for i in range(Y0.size):
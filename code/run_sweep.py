@@ -0,0 +1,131 @@
+'''
+This Script is a RUN function which trains many cultures on the popular Iris Flower dataset to tune the simulation variables used in 'run_main.py'.  Every combination of grid size and growth rule is trained in its own worker process, and accuracy is recorded at several iteration checkpoints so one run covers many iteration counts.
+
+Results are printed as a table and saved to sweep_results.csv.
+'''
+
+# Standard Imports
+import csv
+import sys
+import time
+import itertools
+import numpy as np
+import multiprocessing
+from sklearn.datasets import load_iris
+from sklearn.model_selection import train_test_split
+
+# Peak memory is read from the operating system where it reports it
+try:
+	import resource
+except ImportError:
+	resource = None
+
+# Classifier Imports
+from cultures import rules
+
+# Training and testing data of a worker, handed over once when the worker starts
+data = dict()
+
+# Every rule is trained once on a tiny grid, so loading compiled kernels is not counted against the first culture
+def share(X_train, X_test, Y_train, Y_test):
+
+	for name, a in zip(('X_train', 'X_test', 'Y_train', 'Y_test'), (X_train, X_test, Y_train, Y_test)):
+		a.setflags(write=False)
+		data[name] = a
+
+	for rule in rules.values():
+		luca = rule([3]*X_train.shape[1])
+		luca.inoculate(X_train, Y_train)
+		luca.ferment()
+		luca.freeze()
+		luca.harvest(X_test)
+
+# Peak resident memory of the process in MB, or nan where it cannot be read
+# Linux reports it in kB and macOS in bytes
+def peak():
+
+	if resource is None:
+		return float('nan')
+
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return rss/1024**2 if sys.platform == 'darwin' else rss/1024
+
+# Train one culture and score it at every checkpoint
+# Returns one row per checkpoint holding the settings, accuracy, wall time so far and peak memory in MB
+# Peak memory is counted from the worker's peak before training, leaving out what it inherited and the kernels it loaded
+def train(task):
+
+	m, rule, checkpoints = task
+	start = time.time()
+	base = peak()
+
+	luca = rules[rule]([m]*data['X_train'].shape[1])
+	luca.inoculate(data['X_train'], data['Y_train'])
+
+	rows = []
+	done = 0
+	for c in sorted(checkpoints):
+		for i in range(done, c):
+			luca.ferment()
+		done = c
+
+		luca.freeze()
+		accuracy = np.mean(luca.harvest(data['X_test']) == data['Y_test'])
+		rows.append({'m': m, 'rule': rule, 'iter': c, 'accuracy': accuracy, 'time': time.time() - start, 'memory': peak() - base})
+
+	return rows
+
+if __name__ == "__main__":
+
+	# Ignore warnings
+	import warnings
+	warnings.simplefilter("ignore")
+
+	# Start tracking time
+	start_me = time.time()
+
+	# Print header
+	print("")
+	print("#############################################")
+	print("  Pseudo Cellular Automation Parameter Sweep ")
+	print("           Author: Branden Keck              ")
+	print("#############################################")
+	print("")
+
+	# Important simulation variables
+	# Every grid size is trained with every rule, and scored after each checkpoint number of iterations
+	sizes = [6, 9, 12, 15]
+	models = ['gradient', 'moore', 'vonneumann']
+	checkpoints = [5, 10, 25, 50]
+	workers = multiprocessing.cpu_count()
+
+	# Import the data from sklearn and shuffle it into training and testing datasets
+	print("Importing Iris Dataset...")
+	print("")
+	XT, YT = load_iris(return_X_y = True)
+	X_train, X_test, Y_train, Y_test = train_test_split(XT, YT, test_size=0.5, random_state=0)
+
+	# Train every setting in its own process so peak memory is measured per culture
+	print("Training " + str(len(sizes)*len(models)) + " Cultures on " + str(workers) + " Workers...")
+	print("")
+	tasks = [(m, rule, checkpoints) for m, rule in itertools.product(sizes, models)]
+	with multiprocessing.Pool(workers, share, (X_train, X_test, Y_train, Y_test), maxtasksperchild=1) as pool:
+		results = [row for rows in pool.imap(train, tasks) for row in rows]
+
+	# Print results
+	print("RESULTS:")
+	print("")
+	print("%4s  %-10s  %5s  %8s  %8s  %8s" % ('m', 'rule', 'iter', 'accuracy', 'time', 'memory'))
+	for row in results:
+		print("%4d  %-10s  %5d  %8.4f  %8.3f  %8.1f" % (row['m'], row['rule'], row['iter'], row['accuracy'], row['time'], row['memory']))
+	print("")
+
+	with open('sweep_results.csv', 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=['m', 'rule', 'iter', 'accuracy', 'time', 'memory'])
+		writer.writeheader()
+		writer.writerows(results)
+
+	# Print run time
+	end_me = time.time() - start_me
+	print("Run Time:")
+	print(end_me)
@@ -0,0 +1,127 @@
+'''
+This script runs fermentation of dense cultures whose grids are too large to hold in memory.  It should not be run directly.
+
+Species and fitness live in memory-mapped files, twice over, so each generation is read from one pair of files and written to the other.  The grid is streamed a band of rows at a time along its first axis, each band read with a halo as deep as the growth rule can reach, so only one band is resident at once and the grids match culture.ferment exactly.
+'''
+
+# Standard Imports
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+
+# Grid core
+import petri
+from petri import EMPTY
+from parallel import band
+
+# Dense grid storage kept in memory-mapped files in a directory
+# A second pair of files holds the generation being written
+class mapped(petri.dense):
+
+	def __init__(self, shape, directory, rows=1):
+
+		self.shape = tuple(shape)
+		self.table = None
+		self.files = []
+		for g in range(2):
+			species = open_memmap(os.path.join(directory, 'species' + str(g) + '.npy'), mode='w+', dtype=int, shape=self.shape)
+			fitness = open_memmap(os.path.join(directory, 'fitness' + str(g) + '.npy'), mode='w+', dtype=float, shape=self.shape)
+			for a in range(0, self.shape[0], rows):
+				species[a:a+rows] = EMPTY
+			self.files.append((species, fitness))
+
+		self.species, self.fitness = self.files[0]
+
+	# The generation not currently held by the grid
+	def spare(self):
+
+		return self.files[1] if self.files[0][0] is self.species else self.files[0]
+
+	# Make the spare generation current
+	def swap(self):
+
+		self.table = None
+		self.totals = None
+		self.species, self.fitness = self.spare()
+
+# Rows per band for a memory budget in bytes
+# Growing a band takes many times the size of its species and fitness
+def span(shape, budget):
+
+	return max(1, int(budget // (256*int(np.prod(shape[1:])))))
+
+# Move the grid of a culture into memory-mapped files in a directory
+# Occupied bins are copied cell by cell, so a sparse culture can be moved without ever holding the whole grid
+def spill(culture, directory, budget=2**28):
+
+	os.makedirs(directory, exist_ok=True)
+	grid = mapped(culture.grid.shape, directory, span(culture.grid.shape, budget))
+
+	keys, spec, fit = culture.grid.occupied()
+	grid.species.reshape(-1)[keys] = spec
+	grid.fitness.reshape(-1)[keys] = fit
+	grid.species.flush()
+	grid.fitness.flush()
+
+	culture.grid = grid
+	culture.frontier = None
+
+# Ferment a culture held in memory-mapped files, streaming one band of rows at a time
+# Bands hold the given number of rows, or as many as fit the memory budget in bytes
+# Yields the cell totals of each generation, and once every generation has run leaves fitness totals and change on the culture
+def ferment(culture, iterations, rows=None, budget=2**28):
+
+	if not isinstance(culture.grid, mapped):
+		raise ValueError("Tiled fermentation needs a grid moved to files with spill")
+
+	grid = culture.grid
+	shape = grid.shape
+	k = culture.classes.size
+	step = rows or span(shape, budget)
+	culture.frontier = None
+
+	for i in range(iterations):
+
+		# Cell totals in order of first appearance, gathered band by band
+		order = []
+		seen = np.zeros(k, dtype=bool)
+		counts = np.zeros(k, dtype=int)
+
+		# Change and fitness totals of the generation written
+		change = {'bins': 0, 'grown': 0, 'flips': 0, 'fitness': 0.0}
+		tally, census, total = np.zeros(k), np.zeros(k, dtype=int), 0.0
+
+		species, fitness = grid.species, grid.fitness
+		nspecies, nfitness = grid.spare()
+		for a in range(0, shape[0], step):
+
+			b = min(shape[0], a + step)
+			s0, f0 = np.array(species[a:b]).reshape(-1), np.array(fitness[a:b]).reshape(-1)
+			s1, f1 = band(species, fitness, a, b, culture.rule, culture.classes, culture.axes)
+			nspecies[a:b], nfitness[a:b] = s1, f1
+			s1, f1 = s1.reshape(-1), f1.reshape(-1)
+
+			present = s0[s0 != EMPTY]
+			codes, first = np.unique(present, return_index=True)
+			new = ~seen[codes]
+			order.extend(codes[new][np.argsort(first[new])].tolist())
+			seen[codes] = True
+			counts += np.bincount(present, minlength=k)
+
+			moved = (s0 != s1) | (f0.view(np.int64) != f1.view(np.int64))
+			for name, value in petri.changes(s0[moved], f0[moved], s1[moved], f1[moved]).items():
+				change[name] += value
+
+			t, c, f = petri.tally(s1[s1 != EMPTY], f1[s1 != EMPTY], k)
+			tally, census, total = tally + t, census + c, total + f
+
+		nspecies.flush()
+		nfitness.flush()
+		grid.swap()
+
+		culture.change = change
+		if culture.rule.weighted:
+			culture.totalfitness = total
+			culture.fitnessdict = dict(zip(culture.classes[census > 0], tally[census > 0]))
+
+		yield dict(zip(culture.classes[order], counts[order].tolist()))